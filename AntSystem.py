@@ -4,17 +4,44 @@ from scipy.spatial.distance import euclidean
 from Optimizer import AbstractOptimizer
 import optuna
 import time
-from Problem import FlowShopProblem
-import matplotlib.pyplot as plt
-import cv2
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from Problem import FlowShopProblem, IncrementalEvaluator
+from LocalSearch_simple import LocalSearchOptimizer
+from FrameRecorder import FrameRecorder
+from HeatmapVideo import encode_heatmap_video, encode_in_background
+
+
+_colony = {}  # per-process single-colony optimizer and the shared pheromone matrices, set by _init_colony
+
+
+def _init_colony(problem, params, memory_name, shape):
+    _colony['optimizer'] = AntSystemOptimizer(problem, **dict(params, colonies=1, record_frames=False))
+    # the matrices are read in place from the parent's shared memory block, never pickled
+    _colony['memory'] = shared_memory.SharedMemory(name=memory_name)
+    _colony['pheromones'] = np.ndarray(shape, dtype=np.float64, buffer=_colony['memory'].buf)
+
+
+def _run_colony(colony, state):
+    # the random states travel with the task, so a colony's tours don't depend on which worker builds them
+    optimizer = _colony['optimizer']
+    python_state, numpy_state = state
+    random.setstate(python_state)
+    np.random.set_state(numpy_state)
+    optimizer.pheromoneGraph = _colony['pheromones'][colony]
+    paths, makespans = optimizer.colony_tours(getattr(optimizer, optimizer.visibility_strat))
+    return paths, makespans, (random.getstate(), np.random.get_state())
 
 
 class AntSystemOptimizer(AbstractOptimizer):
     def __init__(self,problem, **params):
+        if params.get('colonies', 1) > 1:
+            # the colonies' tours are scored in worker processes, where a makespan cache would be a private
+            # copy with its own budget that get_results never sees, so multi-colony runs go without one
+            params = dict(params, cache_size=0)
         super().__init__(problem,**params)
 
         # the hyper parameters we will play with in Ant System
-        self.problem = problem
         self.alpha = params.get('alpha',1.0) # pheromone influence
         self.beta = params.get('beta',2.0) # visibility influence
         self.visibility_strat = params.get('visibility_strat','local_makespan') # how is the visiblity calculated
@@ -24,21 +51,242 @@ class AntSystemOptimizer(AbstractOptimizer):
         self.sigma0 = params.get('sigma0',0.2) # initial pheromone value for all edges of the graph
         self.n = params.get('n',500) # number of iterations in total
         self.e = params.get('e',1.0) # elistist factor "pheromone boost to edges of the best path by iteration"
+        # large instances: ants only score the candidate_size most promising unscheduled successors of their
+        # current job instead of every remaining job, and mmas keeps the pheromone between MAX-MIN bounds
+        self.candidate_size = params.get('candidate_size', None)
+        self.mmas = params.get('mmas', False)
+        self.p_best = params.get('p_best', 0.05) # MMAS: chance of rebuilding the best tour once the pheromone has converged
+        # daemon action: a few improving moves of local search on the iteration-best ant before the pheromone update
+        self.local_search = params.get('local_search', False)
+        self.local_search_moves = params.get('local_search_moves', 20)
+        # parallel mode: independent colonies on worker processes, each with its own pheromone matrix in
+        # shared memory, passing their best tour to the next colony every exchange_interval iterations
+        self.colonies = params.get('colonies', 1)
+        self.workers = params.get('workers', None) # defaults to one process per colony
+        self.exchange_interval = params.get('exchange_interval', 0) # 0 = colonies never exchange
+        self.seed = params.get('seed', None)
+        # pheromone snapshots are only kept when record_frames is set, see FrameRecorder for
+        # frame_stride, frame_downsample, frame_capacity (ring buffer) and frame_file (on disk)
+        self.recorder = None
 
         self.pheromoneGraph = np.full((self.problem.num_jobs, self.problem.num_jobs), self.sigma0)
         self.frames = []
 
-    def local_makespan(self,j,path): # compute the total makespan for a job j
-        return np.sum(self.problem.processing_times[:, j])
-    def total_makespan(self,j,path): # compute the total makespan for all jobs in the path, ending with j
-        result= self.problem.evaluate(path+[j])
-        return result
-    
+        # the local visibility only depends on the job (its total processing time), so it is computed once
+        self.job_totals = self.problem.job_processing_times.sum(axis=1, dtype=np.int64)
+        self.static_visibility = (1.0 / self.job_totals) ** self.beta
+        self.successor_order = self._successor_order() if self.candidate_size else None
+        self._local_search = None
+        if self.local_search:
+            self._local_search = LocalSearchOptimizer(problem, first_improvement=True,
+                                                      neighborhood=params.get('local_search_neighborhood', 'insertion'))
+
+    def _successor_order(self):
+        # row i lists the jobs by increasing machine idle time when started right after i (i itself last):
+        # on machine k the idle time is how long it waits, once i is done, for j to come off machine k-1
+        times = self.problem.job_processing_times.astype(np.int64)
+        completions = np.cumsum(times, axis=1)
+        finish = completions[:, 0, None] + times[None, :, 0]
+        idle = np.zeros((len(times), len(times)), dtype=np.int64)
+        for k in range(1, times.shape[1]):
+            start = np.maximum(finish, completions[:, k, None])
+            idle += start - completions[:, k, None]
+            finish = start + times[None, :, k]
+        np.fill_diagonal(idle, np.iinfo(np.int64).max)
+        return np.argsort(idle, axis=1, kind='stable')
+
+    def local_makespan(self, fronts, jobs): # visibility^beta of the jobs from their total processing time
+        return self.static_visibility[jobs]
+
+    def total_makespan(self, fronts, jobs): # visibility^beta from the makespan of each ant's partial path followed by each of its jobs
+        # every ant carries the machine completion times (front) of its partial path, so appending all
+        # candidates of all ants is one batched step instead of re-simulating the whole paths
+        num_ants, num_jobs = jobs.shape
+        candidates = np.repeat(fronts, num_jobs, axis=0)
+        self.problem._batch_step(candidates, jobs.ravel())
+        return (1.0 / candidates[:, -1].reshape(num_ants, num_jobs)) ** self.beta
+
+    def construct_colony(self, tau, visibility):
+        """Tours of all m ants, built in lockstep as an (m, nb_jobs) array.
+
+        tau is the pheromone matrix raised to alpha, visibility one of the two strategies. At each
+        step every ant samples its next job from its row of the masked score matrix with one
+        cumulative sum and one uniform draw. With candidate lists a row only holds the first
+        candidate_size unscheduled jobs of the successor order of the ant's current job: a fixed
+        top-k list would be used up after a few steps on most tours.
+        """
+        nb_jobs = self.problem.num_jobs
+        ants = np.arange(self.m)
+        all_jobs = np.broadcast_to(np.arange(nb_jobs), (self.m, nb_jobs))
+        paths = np.empty((self.m, nb_jobs), dtype=np.intp)
+        paths[:, 0] = np.random.randint(0, nb_jobs, size=self.m) # every ant starts at a random node in the graph
+        available = np.ones((self.m, nb_jobs), dtype=bool)
+        available[ants, paths[:, 0]] = False
+        fronts = np.cumsum(self.problem.job_processing_times[paths[:, 0]], axis=1, dtype=np.int64)
+        for step in range(1, nb_jobs):
+            current = paths[:, step - 1]
+            if self.successor_order is None:
+                chosen = self._choose(tau, visibility, current, fronts, all_jobs, available)
+            else:
+                # every ant has exactly `size` unscheduled jobs among the first ranks of its order
+                size = min(self.candidate_size, nb_jobs - step)
+                order = self.successor_order[current]
+                unscheduled = available[ants[:, None], order]
+                listed = unscheduled & (np.cumsum(unscheduled, axis=1) <= size)
+                jobs = order[listed].reshape(self.m, size)
+                chosen = self._choose(tau, visibility, current, fronts, jobs, np.ones(jobs.shape, dtype=bool))
+            paths[:, step] = chosen
+            available[ants, chosen] = False
+            self.problem._batch_step(fronts, chosen)
+        return paths
+
+    def _choose(self, tau, visibility, current, fronts, jobs, allowed):
+        # next job of each ant among its row of jobs, allowed masks the ones it has already scheduled
+        scores = np.where(allowed, tau[current[:, None], jobs] * visibility(fronts, jobs), 0.0)
+        # same distribution as before: scores plus .001 spread over the allowed jobs (avoids division by 0)
+        scores += allowed * (0.001 / allowed.sum(axis=1, keepdims=True))
+        cumulative = np.cumsum(scores, axis=1)
+        draws = np.random.random(len(jobs)) * cumulative[:, -1]
+        picks = np.argmax(cumulative > draws[:, None], axis=1)
+        # a draw rounded up to the total would land on the first column, fall back to the last allowed job
+        rows = np.arange(len(jobs))
+        last = jobs.shape[1] - 1 - np.argmax(allowed[:, ::-1], axis=1)
+        picks = np.where(allowed[rows, picks], picks, last)
+        return jobs[rows, picks]
+
+    def deposit(self, paths, makespans):
+        """Pheromone laid by the colony on the arcs of its tours, plus the elitist boost of the iteration's best."""
+        nb_jobs = self.problem.num_jobs
+        deltaPheromon = np.zeros((nb_jobs, nb_jobs))
+        deltaSigma = self.q / makespans
+        np.add.at(deltaPheromon, (paths[:, :-1], paths[:, 1:]), np.broadcast_to(deltaSigma[:, None], (len(paths), nb_jobs - 1)))
+        best = int(np.argmin(makespans))
+        np.add.at(deltaPheromon, (paths[best, :-1], paths[best, 1:]), self.e * self.q / makespans[best])
+        return deltaPheromon
+
+    def pheromone_bounds(self, best_makespan):
+        # MMAS bounds: tau_max is where an arc used by every ant of every iteration at the best makespan
+        # settles, tau_min follows Stutzle & Hoos from the chance p_best of rebuilding the best tour
+        nb_jobs = self.problem.num_jobs
+        tau_max = (self.m + self.e) * self.q / (self.ro * best_makespan)
+        root = self.p_best ** (1.0 / nb_jobs)
+        tau_min = tau_max * (1 - root) / (max(nb_jobs / 2 - 1, 1) * root)
+        return min(tau_min, tau_max), tau_max
+
+    def colony_tours(self, visibility):
+        """The colony's tours on the current pheromone and their makespans, the best one improved by the daemon."""
+        tau = self.pheromoneGraph ** self.alpha # raised once per iteration rather than per candidate
+        paths = self.construct_colony(tau, visibility)
+        # the whole colony is scored in one batched call once every ant has finished its tour
+        path_makespans = self.problem.evaluate_batch(paths)
+        if self._local_search is not None:
+            best = int(np.argmin(path_makespans))
+            evaluator = IncrementalEvaluator(self.problem, paths[best])
+            for _ in zip(range(self.local_search_moves), self._local_search._improving_moves(evaluator)):
+                pass
+            paths[best], path_makespans[best] = evaluator.sequence, evaluator.makespan
+        return paths, path_makespans
+
+    def update_pheromone(self, paths, makespans, best_makespan):
+        # evaporation and deposit, in place so that it also works on a matrix in shared memory
+        self.pheromoneGraph *= 1 - self.ro
+        self.pheromoneGraph += self.deposit(paths, makespans)
+        if self.mmas:
+            np.clip(self.pheromoneGraph, *self.pheromone_bounds(best_makespan), out=self.pheromoneGraph)
+
+    def colony_iteration(self, visibility, current_solution, current_makespan):
+        """One iteration: the ants build their tours, the daemon improves the best one and the pheromone is updated.
+
+        Returns the best solution found so far and its makespan.
+        """
+        paths, path_makespans = self.colony_tours(visibility)
+        best = int(np.argmin(path_makespans))
+        if path_makespans[best] < current_makespan:
+            current_solution = paths[best].tolist()
+            current_makespan = int(path_makespans[best])
+        self.update_pheromone(paths, path_makespans, current_makespan)
+        return current_solution, current_makespan
+
+    def _optimize_colonies(self):
+        """Multi-colony run: every iteration each colony builds its tours on a worker, then the parent merges
+        the deposits into the colonies' matrices in colony order (the iteration barrier).
+
+        Colony 0's matrix is the one recorded and left in pheromoneGraph. The random states of the colonies
+        derive from seed and travel with their tasks, so a seeded run gives the same result for any number
+        of workers.
+        """
+        nb_jobs = self.problem.num_jobs
+        seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(self.seed).spawn(self.colonies)]
+        states = [(random.Random(s).getstate(), np.random.RandomState(s).get_state()) for s in seeds]
+        best_solutions = [None] * self.colonies
+        best_makespans = [np.inf] * self.colonies
+
+        shape = (self.colonies, nb_jobs, nb_jobs)
+        memory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        pheromones = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+        try:
+            pheromones[:] = self.sigma0
+            workers = min(self.workers or self.colonies, self.colonies)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_colony,
+                                     initargs=(self.problem, self.params, memory.name, shape)) as pool:
+                for iteration in range(self.n):
+                    for colony, (paths, makespans, state) in enumerate(pool.map(_run_colony, range(self.colonies), states)):
+                        states[colony] = state
+                        best = int(np.argmin(makespans))
+                        if makespans[best] < best_makespans[colony]:
+                            best_solutions[colony], best_makespans[colony] = paths[best].tolist(), int(makespans[best])
+                        self.pheromoneGraph = pheromones[colony]
+                        self.update_pheromone(paths, makespans, best_makespans[colony])
+                    if self.exchange_interval and (iteration + 1) % self.exchange_interval == 0:
+                        self._exchange(pheromones, best_solutions, best_makespans)
+                    if self.recorder is not None:
+                        self.recorder.record(pheromones[0])
+                    makespan = min(best_makespans)
+                    self._colonies_progress(iteration + 1, makespan)
+                    if self._reached_lower_bound(makespan):
+                        break
+        finally:
+            # no view of the block may outlive it
+            self.pheromoneGraph = pheromones[0].copy()
+            del pheromones
+            memory.close()
+            memory.unlink()
+
+        if best_solutions[0] is None:
+            # no iteration ran (n=0): fall back to a random permutation like the single colony does
+            best_solutions[0] = list(np.random.permutation(nb_jobs))
+            best_makespans[0] = self.problem.evaluate(best_solutions[0])
+        best = int(np.argmin(best_makespans))
+        self.best_solution = best_solutions[best]
+        self.best_makespan = best_makespans[best]
+
+    def _exchange(self, pheromones, best_solutions, best_makespans):
+        # every colony lays the iteration-best share of pheromone on the best tour of the previous colony (ring)
+        for colony in range(self.colonies):
+            path = np.asarray(best_solutions[colony - 1])
+            matrix = pheromones[colony]
+            np.add.at(matrix, (path[:-1], path[1:]), (1 + self.e) * self.q / best_makespans[colony - 1])
+            if self.mmas:
+                np.clip(matrix, *self.pheromone_bounds(min(best_makespans)), out=matrix)
+
+    def _colonies_progress(self, iteration, makespan):
+        # progress hook, called with the best makespan of all colonies after every iteration
+        pass
 
     def optimize(self):
         # before starting the construction process, we need a reference solution to compare our algorithm's result with, so let's generate a random permutation
         start_time = time.time()
-        frames = [self.pheromoneGraph]
+        self.recorder = FrameRecorder.from_params(self.params, self.pheromoneGraph.shape, self.n + 1)
+        if self.recorder is not None:
+            self.recorder.record(self.pheromoneGraph)
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+        if self.colonies > 1:
+            self._optimize_colonies()
+            self.frames = self._recorded_frames()
+            self.execution_time = time.time() - start_time
+            return
         current_solution = list(np.random.permutation(self.problem.num_jobs))
         current_makespan = self.problem.evaluate(current_solution)
         functions = {
@@ -47,91 +295,28 @@ class AntSystemOptimizer(AbstractOptimizer):
         }
         visibility = functions[self.visibility_strat] # set the visiblity formula to use later
         for iteration in range(self.n):
-            nb_jobs = self.problem.num_jobs
-            deltaPheromon= np.zeros((self.problem.num_jobs, self.problem.num_jobs))
-            average_makespan = 0
-            ants_log = []
-            for ant in range(self.m):
-                available_jobs = list(range(nb_jobs))
-                path = [] # start with an empty path
-                first_step = np.random.randint(0, nb_jobs)
-                path.append(first_step) # start at a random node in the graph
-                available_jobs.remove(first_step) 
-                while len(available_jobs) > 1: # there are nb_jobs-1 jobs left and the last job will be chosen anyways so we will run nb_jobs-2 iterations
-                    
-                    current_job = path[-1] # get the current job so far
-                    # now we will calculate the probability distribution so that the ant can pick the next task according to that distrbution
-                    score_list = [(self.pheromoneGraph[current_job,job]**self.alpha) * ((1/visibility(job,path))**self.beta) for job in available_jobs] 
-                    total = sum(score_list)
-                    score_list = np.array(score_list)
-                    # added .001 to avoid division by 0
-                    distribution = (score_list+(0.001/len(available_jobs)) )/ (total+0.001)
-                    sampled_job_index = np.random.choice(len(distribution), p=distribution)
-                    selected_job = available_jobs[sampled_job_index]
-                    path.append(selected_job)
-                    available_jobs.remove(selected_job)
-                # now that the loop is done, we should end up with nb_jobs-1 jobs scheduled, leaving us with the last job that will be automatically added to the list
-                path.append(available_jobs[0]) 
-                path_makespan = self.problem.evaluate(path)
-                if(path_makespan<current_makespan):
-                    current_solution=path
-                    current_makespan=path_makespan
-                #print("ant path and makespan : ", path, " ", path_makespan)
-                average_makespan = average_makespan + path_makespan
-                # computing delta sigma for this particular ant for later updates
-                deltaSigma=self.q/path_makespan
-                for arc in range(len(path)-1):
-                    deltaPheromon[path[arc],path[arc+1]]+=deltaSigma
-                ants_log.append((path,path_makespan))
-            best_iteration_path,best_iteration_path_makespan = max(ants_log, key=lambda x: x[1])
-
-            # the elitism part
-            for arc in range(len(best_iteration_path)-1):
-                deltaPheromon[best_iteration_path[arc],best_iteration_path[arc+1]]+=self.e*self.q/best_iteration_path_makespan
-            
-            
-            self.pheromoneGraph= self.pheromoneGraph * (1-self.ro) + deltaPheromon
-            frames.append(self.pheromoneGraph)
-            #print("average makespan per batch : ", average_makespan/self.m, "   ", iteration)
+            current_solution, current_makespan = self.colony_iteration(visibility, current_solution, current_makespan)
+            if self.recorder is not None:
+                self.recorder.record(self.pheromoneGraph)
+            if self._reached_lower_bound(current_makespan):
+                break
         self.best_makespan = current_makespan
         self.best_solution = current_solution
         end_time = time.time()
-        self.frames = frames
+        self.frames = self._recorded_frames()
         self.execution_time = end_time-start_time
 
+    def _recorded_frames(self):
+        if self.recorder is None:
+            return []
+        self.recorder.close()
+        return self.recorder.frames()
 
-
-
-
-    # this visualises the evolution of pheromone intensity on the graph matrix
-    def generate_video(self,matrices, output_file='heatmap_video.mp4', fps=5):
-        n = matrices[0].shape[0]
-        
-        # Set up the figure
-        fig, ax = plt.subplots()
-        vmin = np.min(matrices)
-        vmax = np.max(matrices)
-        cax = ax.imshow(matrices[0], cmap='hot', interpolation='nearest', vmin=vmin, vmax=vmax)
-        plt.axis('off')
-
-        # Use Agg backend to render to a buffer
-        from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-        canvas = FigureCanvas(fig)
-
-        # Grab frame dimensions
-        canvas.draw()
-        width, height = canvas.get_width_height()
-        video = cv2.VideoWriter(output_file, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
-
-        for matrix in matrices:
-            
-            cax.set_data(matrix)
-            canvas.draw()
-            img = np.frombuffer(canvas.tostring_rgb(), dtype='uint8').reshape((height, width, 3))
-            video.write(cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
-
-        video.release()
-        plt.close()
+    # this visualises the evolution of pheromone intensity on the graph matrix (.mp4/.avi, .gif or a folder of PNGs)
+    def generate_video(self,matrices, output_file='heatmap_video.mp4', fps=5, background=False, **options):
+        if background: # returns the encoding thread
+            return encode_in_background(matrices, output_file, fps=fps, **options)
+        return encode_heatmap_video(matrices, output_file, fps=fps, **options)
 
 
     @classmethod
@@ -146,7 +331,10 @@ class AntSystemOptimizer(AbstractOptimizer):
             'm': trial.suggest_int('m', 5, 50), 
             'sigma0': trial.suggest_float("sigma0", 0.01, 1.0, log=True),
             'n': trial.suggest_categorical("n",[50,100,500]),
-            'e': trial.suggest_float("e",0.0,1.0)
+            'e': trial.suggest_float("e",0.0,1.0),
+            'mmas': trial.suggest_categorical("mmas",[True,False]),
+            'local_search': trial.suggest_categorical("local_search",[True,False]),
+            'seed': trial.suggest_int("seed",0,10000)
         }
 
 if __name__ == "__main__":
@@ -207,13 +395,14 @@ if __name__ == "__main__":
         'sigma0': 0.1, # intial pheromon value on all edges
         'n': 100, # number of iterations
         'visibility_strat': 'total_makespan', # visibilty strategy "either total_makespan or local_makespan"
-        'e': 1.0 # elitism factor, 0 means original Ant system algorithm, 1 means max boost to best edges
+        'e': 1.0, # elitism factor, 0 means original Ant system algorithm, 1 means max boost to best edges
+        'record_frames': False # set to True to keep the pheromone matrices for generate_video
     }
 
     optimizer = AntSystemOptimizer(problem, **params)
     optimizer.optimize()
     
-    #uncomment this if you want to see a visualisation of the evolution of the graph matrix
+    #uncomment this (with 'record_frames': True) if you want to see a visualisation of the evolution of the graph matrix
     #optimizer.generate_video(optimizer.frames,fps=30)
 
 
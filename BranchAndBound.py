@@ -0,0 +1,225 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from Optimizer import AbstractOptimizer
+from Problem import FlowShopProblem
+from NEH import neh_sequence
+
+
+# Exact search with bidirectional branching: a node fixes a prefix and a suffix of the sequence and
+# branches by appending an unscheduled job to the prefix or prepending one to the suffix, whichever
+# side leaves fewer children under the upper bound. A node is bounded by the one-machine bound
+#     max over machines k of  front[k] + remaining work on k + back[k]
+# with front/back the completion times of the prefix and of the reversed suffix, each raised to the
+# smallest head/tail of the unscheduled jobs. front, back and the remaining work are carried down the
+# tree and updated in O(m) per child, so all children of a node are bounded in a few numpy passes.
+#
+# A node is (prefix, suffix, front, back, remaining jobs, remaining work per machine, bound).
+
+_search = {}  # per-process processing times, heads, tails and the shared incumbent makespan
+
+
+def _init_search(times, incumbent):
+    _search['times'] = times
+    _search['heads'] = np.cumsum(times, axis=1) - times
+    _search['tails'] = np.cumsum(times[:, ::-1], axis=1)[:, ::-1] - times
+    _search['incumbent'] = incumbent
+
+
+def _min_of_others(values):
+    # row r holds the column-wise minimum over every other row (0 when there is none)
+    if len(values) == 1:
+        return np.zeros_like(values)
+    order = np.argsort(values, axis=0)[:2]
+    cols = np.arange(values.shape[1])
+    first, second = values[order[0], cols], values[order[1], cols]
+    return np.where(np.arange(len(values))[:, None] == order[0], second, first)
+
+
+def _branch(node, upper_bound):
+    """Children of node with a bound below upper_bound, in the order they should be pushed on a stack."""
+    prefix, suffix, front, back, remaining, work, _ = node
+    times = _search['times'][remaining]
+    num_children, num_machines = times.shape
+    work = work - times
+    heads = _min_of_others(_search['heads'][remaining])
+    tails = _min_of_others(_search['tails'][remaining])
+
+    fronts = np.empty_like(times)
+    t = np.zeros(num_children, dtype=np.int64)
+    for k in range(num_machines):
+        t = np.maximum(t, front[k]) + times[:, k]
+        fronts[:, k] = t
+    backs = np.empty_like(times)
+    t = np.zeros(num_children, dtype=np.int64)
+    for k in range(num_machines - 1, -1, -1):
+        t = np.maximum(t, back[k]) + times[:, k]
+        backs[:, k] = t
+
+    # once no job is left the bound is the exact makespan of prefix + suffix
+    forward = (np.maximum(fronts, heads) + work + np.maximum(back, tails)).max(axis=1)
+    backward = (np.maximum(front, heads) + work + np.maximum(backs, tails)).max(axis=1)
+    num_forward = np.count_nonzero(forward < upper_bound)
+    num_backward = np.count_nonzero(backward < upper_bound)
+    append = num_forward < num_backward or (num_forward == num_backward and forward.sum() >= backward.sum())
+    bounds = forward if append else backward
+
+    children = []
+    # worst bound first so the most promising child is popped first
+    for c in np.argsort(-bounds, kind='stable'):
+        if bounds[c] >= upper_bound:
+            continue
+        job, rest = int(remaining[c]), np.delete(remaining, c)
+        if append:
+            children.append((prefix + (job,), suffix, fronts[c], back, rest, work[c], int(bounds[c])))
+        else:
+            children.append((prefix, (job,) + suffix, front, backs[c], rest, work[c], int(bounds[c])))
+    return children
+
+
+def _search_subtree(node, deadline):
+    """Depth-first search below node until it is exhausted or the deadline passes.
+
+    Returns (best makespan, best sequence, nodes expanded, smallest bound left open); the best
+    sequence is None if nothing better than the incumbent was found, the open bound None if the
+    subtree was searched completely.
+    """
+    incumbent = _search['incumbent']
+    best_makespan, best_sequence = None, None
+    stack = [node]
+    nodes = 0
+    while stack:
+        if time.time() >= deadline:
+            return best_makespan, best_sequence, nodes, min(n[6] for n in stack)
+        node = stack.pop()
+        upper_bound = incumbent.value
+        if node[6] >= upper_bound:
+            continue
+        if not len(node[4]):
+            with incumbent.get_lock():
+                if node[6] < incumbent.value:
+                    incumbent.value = node[6]
+            best_makespan, best_sequence = node[6], list(node[0] + node[1])
+            continue
+        nodes += 1
+        stack.extend(_branch(node, upper_bound))
+    return best_makespan, best_sequence, nodes, None
+
+
+class BranchAndBoundOptimizer(AbstractOptimizer):
+    """Exact branch-and-bound for small instances (20 jobs), stopped by a wall-clock limit.
+
+    The incumbent starts from NEH, Iterated Greedy or a given initial_solution. The tree is split
+    breadth-first into subtrees that are searched depth-first, on a process pool when workers > 1,
+    all sharing the incumbent makespan. When the time runs out, the smallest bound still open gives
+    a proven lower bound, so the result always comes with its gap to optimality.
+    """
+
+    # subtrees handed out per worker, so that a slow subtree doesn't leave the others idle
+    SUBTREES_PER_WORKER = 8
+
+    def __init__(self, problem, **params):
+        super().__init__(problem, **params)
+        self.time_limit = params.get('time_limit', 60)  # seconds, None to run until the tree is exhausted
+        self.workers = params.get('workers', 1)  # processes searching subtrees
+        self.upper_bound = params.get('upper_bound', 'neh')  # 'neh' or 'iterated_greedy'
+        self.upper_bound_time = params.get('upper_bound_time', 1.0)  # seconds of Iterated Greedy for the upper bound
+        self.initial_solution = params.get('initial_solution', None)  # e.g. the schedule of another optimizer
+        self.proven_lower_bound = None
+        self.nodes = 0
+
+    def optimize(self):
+        deadline = time.time() + self.time_limit if self.time_limit else float('inf')
+        sequence = self._initial_solution()
+        self.best_solution, self.best_makespan = sequence, int(self.problem.evaluate(sequence))
+        lower_bound = self.problem.lower_bound
+        self.proven_lower_bound = lower_bound
+        self.nodes = 0
+        if self.best_makespan <= lower_bound:
+            self.proven_lower_bound = self.best_makespan
+            return
+
+        times = np.ascontiguousarray(self.problem.job_processing_times, dtype=np.int64)
+        incumbent = multiprocessing.Value('q', self.best_makespan)
+        _init_search(times, incumbent)
+        num_machines = self.problem.num_machines
+        root = ((), (), np.zeros(num_machines, dtype=np.int64), np.zeros(num_machines, dtype=np.int64),
+                np.arange(self.problem.num_jobs), times.sum(axis=0), lower_bound)
+        subtrees = self._split(root, max(1, self.workers) * self.SUBTREES_PER_WORKER)
+
+        results = []
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_search,
+                                     initargs=(times, incumbent)) as pool:
+                futures = [pool.submit(_search_subtree, node, deadline) for node in subtrees]
+                for done, future in enumerate(as_completed(futures), 1):
+                    results.append(future.result())
+                    self._subtree_done(done, len(subtrees), incumbent.value)
+        else:
+            for done, node in enumerate(subtrees, 1):
+                results.append(_search_subtree(node, deadline))
+                self._subtree_done(done, len(subtrees), incumbent.value)
+
+        open_bounds = []
+        for makespan, sequence, nodes, open_bound in results:
+            self.nodes += nodes
+            if sequence is not None and makespan < self.best_makespan:
+                self.best_solution, self.best_makespan = sequence, makespan
+            if open_bound is not None:
+                open_bounds.append(open_bound)
+        self.proven_lower_bound = max(lower_bound, min([self.best_makespan] + open_bounds))
+
+    def _initial_solution(self):
+        if self.initial_solution is not None:
+            return [int(j) for j in self.initial_solution]
+        if self.upper_bound == 'iterated_greedy':
+            from IteratedGreedy import IteratedGreedyOptimizer
+            optimizer = IteratedGreedyOptimizer(self.problem, iterations=10 ** 9, time_limit=self.upper_bound_time,
+                                                seed=self.params.get('seed', None))
+            optimizer.run()
+            return optimizer.best_solution
+        return neh_sequence(self.problem, self.params.get('neh_tie_breaking', 'first'))
+
+    def _split(self, root, count):
+        # breadth-first until there are `count` subtrees to hand out or nothing is left to split
+        upper_bound = _search['incumbent'].value
+        frontier = [root]
+        while len(frontier) < count and any(len(node[4]) for node in frontier):
+            frontier = [child for node in frontier
+                        for child in (_branch(node, upper_bound) if len(node[4]) else [node])]
+        return sorted(frontier, key=lambda node: node[6])
+
+    def _subtree_done(self, done, total, best_makespan):
+        # progress hook, called each time a subtree has been searched
+        pass
+
+    def optimality_gap(self):
+        # gap to the bound proven by the search rather than the instance's static lower bound
+        if self.best_solution is None:
+            return None
+        return (float(self.best_makespan) - self.proven_lower_bound) / self.proven_lower_bound
+
+    def get_results(self):
+        results = super().get_results()
+        results['proven_lower_bound'] = self.proven_lower_bound
+        results['proven_optimal'] = self.best_makespan == self.proven_lower_bound
+        results['nodes'] = self.nodes
+        return results
+
+    @classmethod
+    def suggest_params(cls, trial):
+        return {
+            'upper_bound': trial.suggest_categorical('upper_bound', ['neh', 'iterated_greedy']),
+            'time_limit': trial.suggest_int('time_limit', 10, 600),
+        }
+
+
+if __name__ == "__main__":
+    for path in ['./data/20_5_1.txt', './data/20_5_2.txt']:
+        problem = FlowShopProblem(path)
+        optimizer = BranchAndBoundOptimizer(problem, time_limit=60, workers=2)
+        optimizer.run()
+        results = optimizer.get_results()
+        print(f"{path}: makespan {results['makespan']}, proven lower bound {results['proven_lower_bound']}, "
+              f"gap {results['gap']:.2%}, {results['nodes']} nodes in {results['execution_time']:.2f}s")
@@ -0,0 +1,84 @@
+import math
+import numpy as np
+
+
+class FrameRecorder:
+    """Keeps snapshots of a square matrix (the pheromone graph) taken during a run, within a fixed budget.
+
+    Frames go into one preallocated (slots, size, size) float32 array. It holds a frame every `stride`
+    snapshots, and each frame can be downsampled to the mean of `downsample` x `downsample` blocks.
+    With `capacity` only the last `capacity` frames are kept (ring buffer). With `path` the array is an
+    .npy file mapped on disk, so long runs on large instances don't hold their frames in memory. After
+    close() the file is in chronological order and np.load(path, mmap_mode='r')[:len(recorder)] reads
+    the frames back; before that, a wrapped ring buffer is only in order through frames().
+    """
+
+    def __init__(self, shape, expected, stride=1, downsample=1, capacity=None, path=None):
+        self.stride = max(1, int(stride))
+        self.downsample = max(1, int(downsample))
+        self.path = path
+        # block boundaries for the downsampling, the last block may be smaller
+        self._blocks = np.arange(0, shape[0], self.downsample)
+        self._block_sizes = np.diff(np.append(self._blocks, shape[0]))
+        slots = -(-expected // self.stride)  # frames if every snapshot is offered once
+        if capacity:
+            slots = min(slots, int(capacity))
+        slots = max(1, slots)
+        frame_shape = (slots, len(self._blocks), len(self._blocks))
+        if path is None:
+            # pages of np.empty are only committed as frames are written
+            self._storage = np.empty(frame_shape, dtype=np.float32)
+        else:
+            self._storage = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=frame_shape)
+        self.offered = 0  # snapshots offered, recorded or not
+        self.count = 0  # frames recorded, including the ones the ring buffer has overwritten
+        self._shift = 0  # frame k is in slot (k + _shift) % slots, close() moves the oldest one to slot 0
+
+    @classmethod
+    def from_params(cls, params, shape, expected):
+        # the recorder an optimizer's params ask for, None when recording is off (the default)
+        if not params.get('record_frames', False):
+            return None
+        return cls(shape, expected,
+                   stride=params.get('frame_stride', 1),
+                   downsample=params.get('frame_downsample', 1),
+                   capacity=params.get('frame_capacity', None),
+                   path=params.get('frame_file', None))
+
+    def record(self, matrix):
+        offered, self.offered = self.offered, self.offered + 1
+        if offered % self.stride:
+            return
+        if self.downsample > 1:
+            sums = np.add.reduceat(np.add.reduceat(matrix, self._blocks, axis=0), self._blocks, axis=1)
+            matrix = sums / np.outer(self._block_sizes, self._block_sizes)
+        self._storage[(self.count + self._shift) % len(self._storage)] = matrix
+        self.count += 1
+
+    def frames(self):
+        """Recorded frames, oldest first. A view of the storage unless the ring buffer has wrapped."""
+        slots = len(self._storage)
+        if self.count <= slots:
+            return self._storage[:self.count]
+        start = (self.count + self._shift) % slots
+        return np.concatenate([self._storage[start:], self._storage[:start]])
+
+    def close(self):
+        # flushes a disk-backed recorder, rotating a wrapped ring buffer so the file reads oldest first
+        if self.path is None:
+            return
+        slots = len(self._storage)
+        start = (self.count + self._shift) % slots if self.count > slots else 0
+        if start:
+            # in place, one cycle at a time, holding a single frame in memory
+            for first in range(math.gcd(slots, start)):
+                saved, i = self._storage[first].copy(), first
+                while (i + start) % slots != first:
+                    self._storage[i] = self._storage[(i + start) % slots]
+                    i = (i + start) % slots
+                self._storage[i] = saved
+            self._shift = (self._shift - start) % slots
+        self._storage.flush()
+
+    def __len__(self):
+        return min(self.count, len(self._storage))
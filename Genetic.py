@@ -1,16 +1,71 @@
 import random
 import time
+from concurrent.futures import ProcessPoolExecutor
 from Optimizer import AbstractOptimizer
-from Problem import FlowShopProblem
+from Problem import FlowShopProblem, IncrementalEvaluator
+from NEH import neh_sequence
+from LocalSearch_simple import LocalSearchOptimizer
 import numpy as np
 
-class Individual:
-    def __init__(self, permutation, makespan):
-        self.permutation = permutation
-        self.makespan = makespan
+
+# Island model: every island is a single-population GA whose state (population, makespans and the
+# states of both random generators) travels to a pool worker for each epoch of migration_interval
+# generations and comes back for the migration. Which worker runs which island doesn't matter, so
+# a run is reproducible from its seed and island count. Workers also send back the evaluations they
+# spent, counted from zero for each call since one worker process may run several islands.
+
+_island = {}  # the per-process single-population optimizer, set by _init_island
+
+
+def _init_island(problem, params):
+    # island mode has no makespan cache (see GeneticAlgorithmOptimizer.__init__), params say cache_size=0
+    _island['optimizer'] = GeneticAlgorithmOptimizer(problem, **dict(params, islands=1))
+
+
+def _start_island(seed):
+    optimizer = _island['optimizer']
+    optimizer.evaluations = dict.fromkeys(optimizer.evaluations, 0)
+    optimizer._refined_elite = None  # belongs to whichever island ran here before
+    random.seed(seed)
+    np.random.seed(seed)
+    population, makespans = optimizer._initial_population()
+    return (population, makespans, random.getstate(), np.random.get_state()), optimizer.evaluations
+
+
+def _evolve_island(state, generations):
+    optimizer = _island['optimizer']
+    optimizer.evaluations = dict.fromkeys(optimizer.evaluations, 0)
+    optimizer._refined_elite = None  # belongs to whichever island ran here before
+    population, makespans, python_state, numpy_state = state
+    random.setstate(python_state)
+    np.random.set_state(numpy_state)
+    population, makespans = optimizer._evolve(population, makespans, generations)
+    return (population, makespans, random.getstate(), np.random.get_state()), optimizer.evaluations
+
 
 class GeneticAlgorithmOptimizer(AbstractOptimizer):
+    """Generational GA with elitism. The population is a (population_size, num_jobs) array of
+    permutations next to a vector of their makespans, -1 marking offspring still to be evaluated."""
+
+    # crossover_type -> operator producing two children from two parents; every operator is O(n),
+    # built on boolean "job already placed" masks and position arrays instead of membership tests
+    CROSSOVERS = {
+        'one_point': '_one_point_crossover',
+        'two_point': '_two_point_crossover',
+        'ox': '_order_crossover',
+        'pmx': '_pmx_crossover',
+        'similar_job': '_similar_job_crossover',
+    }
+    # crossovers applied to all crossing pairs of a generation at once
+    BATCH_CROSSOVERS = {
+        'similar_job_batch': '_batch_similar_job_crossover',
+    }
+
     def __init__(self, problem, **params):
+        if params.get('islands', 1) > 1:
+            # every worker process would score its islands through its own copy of the makespan cache,
+            # each with the full budget and none of it showing in get_results, so islands run without one
+            params = dict(params, cache_size=0)
         super().__init__(problem, **params)
         # GA parameters
         self.population_size = params.get('population_size', 60)
@@ -23,118 +78,304 @@ class GeneticAlgorithmOptimizer(AbstractOptimizer):
         self.selection_type = params.get('selection_type', 'roulette')  # 'roulette' or 'tournament'
         self.tournament_size = params.get('tournament_size', 3)
         # Crossover settings
-        self.crossover_type = params.get('crossover_type', 'two_point')  # 'two_point' or 'one_point'
+        self.crossover_type = params.get('crossover_type', 'two_point')  # a key of CROSSOVERS or BATCH_CROSSOVERS
+        if self.crossover_type not in self.CROSSOVERS and self.crossover_type not in self.BATCH_CROSSOVERS:
+            raise ValueError(f"Unknown crossover type: {self.crossover_type}")
         # Mutation settings
         self.mutation_type = params.get('mutation_type', 'inversion')  # 'inversion' or 'swap'
+        # NEH seed settings
+        self.neh_tie_breaking = params.get('neh_tie_breaking', 'first')  # 'first', 'last' or 'random'
+        # Island model settings (islands=1 is the plain single-population GA)
+        self.islands = params.get('islands', 1)
+        self.migration_interval = params.get('migration_interval', 10)  # generations between migrations
+        self.migrants = params.get('migrants', 2)  # best individuals sent by each island
+        self.topology = params.get('topology', 'ring')  # 'ring' or 'random'
+        self.workers = params.get('workers', None)  # processes, one per island by default
+        if self.islands > 1 and self.migration_interval < 1:
+            raise ValueError(f"migration_interval must be at least 1, got {self.migration_interval}")
+        # Memetic settings: a bounded first-improvement local search refines part of the offspring
+        # and the elite, through an IncrementalEvaluator so each move re-simulates only a suffix
+        self.local_search_rate = params.get('local_search_rate', 0.0)  # fraction of offspring refined
+        self.local_search_elite = params.get('local_search_elite', self.local_search_rate > 0)
+        self.local_search_moves = params.get('local_search_moves', 20)  # improving moves per refinement
+        self._local_search = None
+        if self.local_search_rate > 0 or self.local_search_elite:
+            self._local_search = LocalSearchOptimizer(problem, first_improvement=True,
+                                                      neighborhood=params.get('local_search_neighborhood', 'insertion'))
+        self._refined_elite = None  # the elite is only refined again once it has changed
+        # makespans computed for new individuals vs. neighbors scored by the local search
+        self.evaluations = {'offspring': 0, 'local_search': 0}
 
     def _neh_sequence(self):
-        proc_times = self.problem.get_processing_times()
-        total_times = np.sum(proc_times, axis=0)
-        jobs_sorted = list(map(int, np.argsort(-total_times)))
-        sequence = [jobs_sorted[0]]
-        for job in jobs_sorted[1:]:
-            best_seq, best_ms = None, float('inf')
-            for pos in range(len(sequence) + 1):
-                trial = sequence[:pos] + [job] + sequence[pos:]
-                ms = self.problem.evaluate(trial)
-                if ms < best_ms:
-                    best_ms, best_seq = ms, trial
-            sequence = best_seq
-        return sequence
+        return neh_sequence(self.problem, self.neh_tie_breaking)
 
     def optimize(self):
+        self.evaluations = dict.fromkeys(self.evaluations, 0)
+        self._refined_elite = None
+        if self.islands > 1:
+            self._optimize_islands()
+            return
         if self.seed is not None:
             random.seed(self.seed)
             np.random.seed(self.seed)
-        # Initial population
-        population = []
-        # NEH seed
-        neh = self._neh_sequence()
-        population.append(Individual(neh, self.problem.evaluate(neh)))
-        base = list(range(self.problem.get_num_jobs()))
-        for _ in range(self.population_size - 1):
-            perm = base[:]
-            random.shuffle(perm)
-            population.append(Individual(perm, self.problem.evaluate(perm)))
-
-        for _ in range(self.iterations):
-            new_pop = []
-            best = min(population, key=lambda i: i.makespan)
-            new_pop.append(best)
-            while len(new_pop) < self.population_size:
-                # Selection
-                if self.selection_type == 'tournament':
-                    p1 = self._tournament_selection(population)
-                    p2 = self._tournament_selection(population)
-                else:
-                    p1 = self._roulette_selection(population)
-                    p2 = self._roulette_selection(population)
-                # Crossover
-                if random.random() < self.crossover_rate:
-                    if self.crossover_type == 'one_point':
-                        c1, c2 = self._one_point_crossover(p1, p2)
-                    else:
-                        c1, c2 = self._two_point_crossover(p1, p2)
-                else:
-                    c1 = Individual(p1.permutation[:], p1.makespan)
-                    c2 = Individual(p2.permutation[:], p2.makespan)
-                # Mutation
-                for child in (c1, c2):
-                    if random.random() < self.mutation_rate:
-                        if self.mutation_type == 'swap':
-                            self._swap_mutation(child)
-                        else:
-                            self._inversion_mutation(child)
-                new_pop.extend([c1, c2][:self.population_size - len(new_pop)])
-            population = new_pop
-
-        best_final = min(population, key=lambda i: i.makespan)
-        self.best_solution = [int(j) for j in best_final.permutation]
-        self.best_makespan = best_final.makespan
-
-    def _roulette_selection(self, pop):
-        fits = [1.0 / ind.makespan for ind in pop]
-        total = sum(fits)
-        r = random.uniform(0, total)
-        cum = 0
-        for ind, f in zip(pop, fits):
-            cum += f
-            if cum >= r:
-                return ind
-        return pop[-1]
-
-    def _tournament_selection(self, pop):
-        cont = random.sample(pop, self.tournament_size)
-        return min(cont, key=lambda i: i.makespan)
+        population, makespans = self._initial_population()
+        population, makespans = self._evolve(population, makespans, self.iterations)
+
+        best = int(np.argmin(makespans))
+        self.best_solution = [int(j) for j in population[best]]
+        self.best_makespan = int(makespans[best])
+
+    def _evolve(self, population, makespans, generations):
+        for _ in range(generations):
+            best = int(np.argmin(makespans))
+            if self._reached_lower_bound(makespans[best]):
+                break
+            population, makespans = self._next_generation(population, makespans, best)
+        return population, makespans
+
+    def _optimize_islands(self):
+        # independent seeds per island (and one for the random topology), all derived from self.seed
+        seeds = np.random.SeedSequence(self.seed).spawn(self.islands + 1)
+        island_seeds = [int(s.generate_state(1)[0]) for s in seeds[:-1]]
+        rng = np.random.default_rng(seeds[-1])
+
+        workers = min(self.workers or self.islands, self.islands)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_island,
+                                 initargs=(self.problem, self.params)) as pool:
+            states = self._collect(pool.map(_start_island, island_seeds))
+            generation = 0
+            while True:
+                makespan, solution = self._islands_best(states)
+                self._islands_progress(generation, makespan)
+                if generation >= self.iterations or self._reached_lower_bound(makespan):
+                    break
+                epoch = min(self.migration_interval, self.iterations - generation)
+                states = self._collect(pool.map(_evolve_island, states, [epoch] * self.islands))
+                generation += epoch
+                self._migrate(states, rng)
+
+        self.best_solution = [int(j) for j in solution]
+        self.best_makespan = int(makespan)
+
+    def _collect(self, results):
+        # island states, adding the evaluations their workers report
+        states = []
+        for state, evaluations in results:
+            states.append(state)
+            for kind, count in evaluations.items():
+                self.evaluations[kind] += count
+        return states
+
+    def _islands_best(self, states):
+        best = min(range(len(states)), key=lambda k: states[k][1].min())
+        population, makespans = states[best][:2]
+        return makespans.min(), population[np.argmin(makespans)]
+
+    def _migrate(self, states, rng):
+        """Copies of each island's best individuals replace the worst ones of its target island."""
+        count = min(self.migrants, self.population_size - 1)
+        if count <= 0:
+            return
+        if self.topology == 'random':
+            targets = [(k + int(rng.integers(1, self.islands))) % self.islands for k in range(self.islands)]
+        else:
+            targets = [(k + 1) % self.islands for k in range(self.islands)]
+        # every island sends its best before any of them receives
+        emigrants = []
+        for population, makespans, _, _ in states:
+            best = np.argsort(makespans, kind='stable')[:count]
+            emigrants.append((population[best].copy(), makespans[best].copy()))
+        for (population, makespans), target in zip(emigrants, targets):
+            worst = np.argsort(states[target][1], kind='stable')[::-1][:count]
+            states[target][0][worst] = population
+            states[target][1][worst] = makespans
+
+    def _islands_progress(self, generation, makespan):
+        # progress hook, called with the global best after every migration
+        pass
+
+    def _initial_population(self):
+        # NEH seed plus random permutations
+        n = self.problem.get_num_jobs()
+        population = np.empty((self.population_size, n), dtype=np.intp)
+        population[0] = self._neh_sequence()
+        population[1:] = np.argsort(np.random.random((self.population_size - 1, n)), axis=1)
+        makespans = np.full(self.population_size, -1, dtype=np.int64)
+        self._evaluate_population(population, makespans)
+        return population, makespans
+
+    def _next_generation(self, population, makespans, best):
+        """Offspring of population, the individual at index best being kept as is (elitism)."""
+        num_pairs = self.population_size // 2  # enough children for the population_size - 1 free slots
+        parents = self._select(makespans, 2 * num_pairs).reshape(num_pairs, 2)
+        children = population[parents.ravel()]
+        child_makespans = makespans[parents.ravel()]  # unchanged copies of their parents keep the makespan
+
+        # Crossover
+        crossing = np.flatnonzero(np.random.random(num_pairs) < self.crossover_rate)
+        if self.crossover_type in self.BATCH_CROSSOVERS:
+            crossover = getattr(self, self.BATCH_CROSSOVERS[self.crossover_type])
+            children[2 * crossing], children[2 * crossing + 1] = crossover(population[parents[crossing, 0]],
+                                                                         population[parents[crossing, 1]])
+        else:
+            crossover = getattr(self, self.CROSSOVERS[self.crossover_type])
+            for k in crossing:
+                children[2 * k], children[2 * k + 1] = crossover(population[parents[k, 0]], population[parents[k, 1]])
+        child_makespans[2 * crossing] = -1
+        child_makespans[2 * crossing + 1] = -1
+        # Mutation
+        for r in np.flatnonzero(np.random.random(len(children)) < self.mutation_rate):
+            if self.mutation_type == 'swap':
+                self._swap_mutation(children[r])
+            else:
+                self._inversion_mutation(children[r])
+            child_makespans[r] = -1
+
+        free = self.population_size - 1
+        new_population = np.concatenate((population[best:best + 1], children[:free]))
+        new_makespans = np.concatenate((makespans[best:best + 1], child_makespans[:free]))
+        self._evaluate_population(new_population, new_makespans)
+        if self._local_search is not None:
+            self._refine(new_population, new_makespans)
+        return new_population, new_makespans
+
+    def _evaluate_population(self, population, makespans):
+        # offspring come unevaluated (makespan -1); score the whole generation in one batch
+        pending = np.flatnonzero(makespans < 0)
+        if len(pending):
+            makespans[pending] = self.problem.evaluate_batch(population[pending])
+            self.evaluations['offspring'] += len(pending)
+
+    def _refine(self, population, makespans):
+        """Memetic step: local search on the elite (row 0) and a random share of the offspring, in place."""
+        rows = 1 + np.flatnonzero(np.random.random(len(population) - 1) < self.local_search_rate)
+        if self.local_search_elite and population[0].tobytes() != self._refined_elite:
+            rows = np.concatenate(([0], rows))
+        for r in rows:
+            evaluator = IncrementalEvaluator(self.problem, population[r])
+            moves = self._local_search._improving_moves(evaluator)
+            for _ in zip(range(self.local_search_moves), moves):
+                pass
+            self.evaluations['local_search'] += evaluator.evaluations
+            population[r], makespans[r] = evaluator.sequence, evaluator.makespan
+        if self.local_search_elite:
+            self._refined_elite = population[0].tobytes()
+
+    def _select(self, makespans, count):
+        """Indices of count parents, drawn with replacement across draws."""
+        if self.selection_type == 'tournament':
+            return self._tournament_selection(makespans, count)
+        return self._roulette_selection(makespans, count)
+
+    def _roulette_selection(self, makespans, count):
+        # fitness 1/makespan; one cumulative table per generation, each pick is a binary search
+        cumulative = np.cumsum(1.0 / makespans)
+        picks = np.searchsorted(cumulative, np.random.random(count) * cumulative[-1], side='left')
+        return np.minimum(picks, len(makespans) - 1)
+
+    def _tournament_selection(self, makespans, count):
+        # each row draws tournament_size contestants (with replacement), the lowest makespan wins
+        contestants = np.random.randint(len(makespans), size=(count, self.tournament_size))
+        winners = np.argmin(makespans[contestants], axis=1)
+        return contestants[np.arange(count), winners]
 
     def _one_point_crossover(self, p1, p2):
-        n = len(p1.permutation)
+        n = len(p1)
         pt = random.randrange(1, n)
-        seq1 = p1.permutation[:pt] + [j for j in p2.permutation if j not in p1.permutation[:pt]]
-        seq2 = p2.permutation[:pt] + [j for j in p1.permutation if j not in p2.permutation[:pt]]
-        return (Individual(seq1, self.problem.evaluate(seq1)),
-                Individual(seq2, self.problem.evaluate(seq2)))
+        return self._fill_from(p1[:pt], p2), self._fill_from(p2[:pt], p1)
+
+    def _fill_from(self, head, donor):
+        # head followed by the jobs of donor that are not in head, in donor order
+        used = np.zeros(len(donor), dtype=bool)
+        used[head] = True
+        return np.concatenate((head, donor[~used[donor]]))
 
     def _two_point_crossover(self, p1, p2):
-        n = len(p1.permutation)
+        n = len(p1)
         i, j = sorted(random.sample(range(n), 2))
-        c1, c2 = p1.permutation[:], p2.permutation[:]
-        c1[i:j+1], c2[i:j+1] = p2.permutation[i:j+1], p1.permutation[i:j+1]
+        c1, c2 = p1.tolist(), p2.tolist()
+        c1[i:j+1], c2[i:j+1] = c2[i:j+1], c1[i:j+1]
         self._repair(c1); self._repair(c2)
-        return (Individual(c1, self.problem.evaluate(c1)),
-                Individual(c2, self.problem.evaluate(c2)))
+        return c1, c2
+
+    def _order_crossover(self, p1, p2):
+        # OX: the child keeps a segment of one parent in place, the other positions are filled from
+        # the second cut point on (wrapping around) with the other parent's remaining jobs in its order
+        n = len(p1)
+        i, j = sorted(random.sample(range(n), 2))
+        after = np.roll(np.arange(n), -(j + 1))
+        free = after[:n - (j - i + 1)]  # positions after the segment, then the ones before it
 
-    def _inversion_mutation(self, ind):
-        perm = ind.permutation
+        def child(keep, donor):
+            c = np.empty_like(keep)
+            c[i:j+1] = keep[i:j+1]
+            used = np.zeros(n, dtype=bool)
+            used[keep[i:j+1]] = True
+            order = donor[after]
+            c[free] = order[~used[order]]
+            return c
+
+        return child(p1, p2), child(p2, p1)
+
+    def _pmx_crossover(self, p1, p2):
+        # PMX: the child takes a segment of one parent and the other parent elsewhere; a job of the
+        # other parent's segment that got displaced goes where the mapping p1[k] <-> p2[k] leads out
+        # of the segment. The mapping chains are disjoint, so placing all of them is O(n).
+        n = len(p1)
+        i, j = sorted(random.sample(range(n), 2))
+
+        def child(keep, donor):
+            c = donor.copy()
+            c[i:j+1] = keep[i:j+1]
+            in_segment = np.zeros(n, dtype=bool)
+            in_segment[keep[i:j+1]] = True
+            position = np.empty(n, dtype=np.intp)
+            position[donor] = np.arange(n)
+            for k in range(i, j + 1):
+                job = donor[k]
+                if in_segment[job]:
+                    continue
+                pos = position[keep[k]]
+                while i <= pos <= j:
+                    pos = position[keep[pos]]
+                c[pos] = job
+            return c
+
+        return child(p1, p2), child(p2, p1)
+
+    def _similar_job_crossover(self, p1, p2):
+        c1, c2 = self._batch_similar_job_crossover(p1[None], p2[None])
+        return c1[0], c2[0]
+
+    def _batch_similar_job_crossover(self, first, second):
+        """Ruiz-Maroto similar job two-point order crossover (SJ2OX) on rows of parent pairs.
+
+        Jobs at the same position in both parents and the segment between two cut points are kept
+        from the parent, the remaining positions take the other parent's missing jobs in its order.
+        """
+        k, n = first.shape
+        cuts = np.sort(np.random.randint(n, size=(k, 2)), axis=1)
+        positions = np.arange(n)
+        keep = (first == second) | ((positions >= cuts[:, :1]) & (positions <= cuts[:, 1:]))
+        return self._order_fill(first, second, keep), self._order_fill(second, first, keep)
+
+    def _order_fill(self, parents, donors, keep):
+        # row-wise: keep the marked positions of parents, fill the others with the jobs of donors
+        # that aren't kept, in donor order (both sides are read in row-major order, same counts per row)
+        rows = np.arange(len(parents))[:, None]
+        used = np.zeros(parents.shape, dtype=bool)
+        used[np.nonzero(keep)[0], parents[keep]] = True
+        children = parents.copy()
+        children[~keep] = donors[~used[rows, donors]]
+        return children
+
+    def _inversion_mutation(self, perm):
         i, j = sorted(random.sample(range(len(perm)), 2))
-        perm[i:j+1] = reversed(perm[i:j+1])
-        ind.makespan = self.problem.evaluate(perm)
+        perm[i:j+1] = perm[i:j+1][::-1]
 
-    def _swap_mutation(self, ind):
-        perm = ind.permutation
+    def _swap_mutation(self, perm):
         i, j = random.sample(range(len(perm)), 2)
         perm[i], perm[j] = perm[j], perm[i]
-        ind.makespan = self.problem.evaluate(perm)
 
     def _repair(self, perm):
         n = len(perm); present = [False]*n
@@ -158,10 +399,21 @@ class GeneticAlgorithmOptimizer(AbstractOptimizer):
             'seed': trial.suggest_int('seed', 0, 10000),
             'selection_type': trial.suggest_categorical('selection_type', ['roulette', 'tournament']),
             'tournament_size': trial.suggest_int('tournament_size', 2, 10),
-            'crossover_type': trial.suggest_categorical('crossover_type', ['two_point', 'one_point']),
-            'mutation_type': trial.suggest_categorical('mutation_type', ['inversion', 'swap'])
+            'crossover_type': trial.suggest_categorical('crossover_type', ['two_point', 'one_point', 'ox', 'pmx', 'similar_job', 'similar_job_batch']),
+            'mutation_type': trial.suggest_categorical('mutation_type', ['inversion', 'swap']),
+            'migration_interval': trial.suggest_int('migration_interval', 5, 50),
+            'migrants': trial.suggest_int('migrants', 1, 5),
+            'topology': trial.suggest_categorical('topology', ['ring', 'random']),
+            'local_search_rate': trial.suggest_float('local_search_rate', 0.0, 0.5),
+            'local_search_moves': trial.suggest_int('local_search_moves', 1, 50),
+            'local_search_neighborhood': trial.suggest_categorical('local_search_neighborhood', ['insertion', 'swap'])
         }
 
+    def get_results(self):
+        results = super().get_results()
+        results['evaluations'] = dict(self.evaluations)
+        return results
+
 if __name__ == "__main__":
     problem = FlowShopProblem('./data/20_20_1.txt')
     params = {
@@ -0,0 +1,69 @@
+import os
+import threading
+import numpy as np
+import cv2
+import matplotlib.pyplot as plt
+
+
+# Heatmap export without matplotlib in the loop: every matrix is scaled to 0..255 on the color range of
+# the whole run, mapped through a 256-entry colormap table and blown up by an integer factor, which
+# gives the uint8 image cv2 writes directly.
+
+VIDEO_CODECS = {'.mp4': 'mp4v', '.avi': 'MJPG'}
+
+
+def colormap_lut(cmap='hot'):
+    # 256 BGR colors, indexed by a uint8 image
+    colors = plt.get_cmap(cmap)(np.linspace(0, 1, 256))[:, 2::-1]
+    return np.round(colors * 255).astype(np.uint8)
+
+
+def heatmap_frames(matrices, cmap='hot', size=480):
+    """BGR uint8 images of matrices, about size pixels on their longest side."""
+    vmin, vmax = float(np.min(matrices)), float(np.max(matrices))
+    scale = 255.0 / (vmax - vmin) if vmax > vmin else 0.0
+    lut = colormap_lut(cmap)
+    factor = max(1, size // max(np.shape(matrices[0])))
+    for matrix in matrices:
+        index = ((np.asarray(matrix) - vmin) * scale).astype(np.uint8)
+        index = np.repeat(np.repeat(index, factor, axis=0), factor, axis=1)
+        yield lut[index]
+
+
+def encode_heatmap_video(matrices, output_file, fps=5, cmap='hot', size=480):
+    """Writes matrices as an .mp4/.avi video, an animated .gif, or PNG images when output_file has no extension."""
+    extension = os.path.splitext(output_file)[1].lower()
+    frames = heatmap_frames(matrices, cmap, size)
+    if extension in VIDEO_CODECS:
+        video = None
+        for frame in frames:
+            if video is None:
+                height, width = frame.shape[:2]
+                video = cv2.VideoWriter(output_file, cv2.VideoWriter_fourcc(*VIDEO_CODECS[extension]), fps, (width, height))
+            video.write(frame)
+        if video is not None:
+            video.release()
+    elif extension == '.gif':
+        from PIL import Image  # installed with matplotlib
+        images = [Image.fromarray(frame[:, :, ::-1]) for frame in frames]
+        if images:
+            images[0].save(output_file, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+    elif not extension:
+        os.makedirs(output_file, exist_ok=True)
+        for i, frame in enumerate(frames):
+            cv2.imwrite(os.path.join(output_file, f'frame_{i:05d}.png'), frame)
+    else:
+        raise ValueError(f"Unsupported output format: {output_file}")
+    return output_file
+
+
+def encode_in_background(matrices, output_file, callback=None, **options):
+    """encode_heatmap_video on a worker thread, callback(output_file) once it is written; returns the thread."""
+    def encode():
+        encode_heatmap_video(matrices, output_file, **options)
+        if callback is not None:
+            callback(output_file)
+
+    thread = threading.Thread(target=encode, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,72 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from Problem import FlowShopProblem
+
+
+class InstanceEntry:
+    """One loaded instance plus the data derived from it, all read-only."""
+
+    def __init__(self, path, mtime):
+        self.path = path
+        self.mtime = mtime
+        self.problem = FlowShopProblem(path)
+        # computed now so that every copy handed out shares the cached value
+        self.problem.lower_bound
+        self.job_totals = self.problem.job_processing_times.sum(axis=1, dtype=np.int64)
+        self.features = self._features(self.problem.processing_times)
+        for array in (self.problem.processing_times, self.problem.job_processing_times,
+                      self.problem._job_cumsum, self.problem._job_cumsum_before, self.job_totals):
+            array.flags.writeable = False
+
+    def _features(self, processing_times):
+        avg_processing_time = float(np.mean(processing_times))
+        std_processing_time = float(np.std(processing_times))
+        return {
+            'num_jobs': int(self.problem.num_jobs),
+            'num_machines': int(self.problem.num_machines),
+            'avg_processing_time': avg_processing_time,
+            'std_processing_time': std_processing_time,
+            'max_processing_time': int(np.max(processing_times)),
+            'min_processing_time': int(np.min(processing_times)),
+            'coefficient_of_variation': std_processing_time / avg_processing_time,
+            'lower_bound': int(self.problem.lower_bound)
+        }
+
+
+class InstanceRegistry:
+    """Thread-safe LRU of loaded instances, keyed by path and invalidated when the file's mtime changes."""
+
+    def __init__(self, max_instances=32):
+        self.max_instances = max_instances
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def entry(self, path):
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime == mtime:
+                self.hits += 1
+                self._entries.move_to_end(path)
+                return entry
+            entry = InstanceEntry(path, mtime)
+            self.loads += 1
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_instances:
+                self._entries.popitem(last=False)
+            return entry
+
+    def problem(self, path):
+        # every caller gets its own FlowShopProblem (evaluate keeps a per-object buffer)
+        # backed by the shared arrays of the cached instance
+        return self.entry(path).problem.copy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
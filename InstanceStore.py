@@ -0,0 +1,101 @@
+import os
+import struct
+import numpy as np
+
+
+# Binary instance format (.fsp):
+#   16-byte header: magic b'FSP1', uint16 format version, uint16 bytes per processing time (2 or 4),
+#                   uint32 number of jobs, uint32 number of machines (all little endian)
+#   body: the processing times as a job-major (num_jobs, num_machines) little-endian matrix
+# so an instance opens with np.memmap straight into the layout the evaluation code walks.
+
+MAGIC = b'FSP1'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+EXTENSION = '.fsp'
+DTYPES = {2: np.dtype('<u2'), 4: np.dtype('<u4')}
+
+
+def write_binary(path, processing_times):
+    """Writes a (num_machines, num_jobs) processing-time matrix, as used by FlowShopProblem, to path."""
+    processing_times = np.asarray(processing_times)
+    if processing_times.min() < 0:
+        raise ValueError("Processing times must be non-negative")
+    width = 2 if processing_times.max() <= np.iinfo(np.uint16).max else 4
+    num_machines, num_jobs = processing_times.shape
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, width, num_jobs, num_machines))
+        file.write(np.ascontiguousarray(processing_times.T, dtype=DTYPES[width]).tobytes())
+
+
+def read_header(path):
+    with open(path, 'rb') as file:
+        magic, version, width, num_jobs, num_machines = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary flow shop instance")
+    if version != VERSION or width not in DTYPES:
+        raise ValueError(f"Unsupported binary instance (version {version}, {width}-byte times) in {path}")
+    return num_jobs, num_machines, DTYPES[width]
+
+
+def open_binary(path):
+    """Read-only memory map of the job-major (num_jobs, num_machines) processing times, no copy."""
+    num_jobs, num_machines, dtype = read_header(path)
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size, shape=(num_jobs, num_machines))
+
+
+def read_text(path):
+    """Instances of a text file: the repo's single-matrix format or a Taillard benchmark file.
+
+    Yields (num_machines, num_jobs) matrices. A Taillard file holds several instances, each one
+    introduced by a 'number of jobs, number of machines, ...' line followed by its sizes and a
+    'processing times :' line.
+    """
+    with open(path, 'r') as file:
+        lines = [line.strip() for line in file if line.strip()]
+
+    if not lines[0][0].isdigit():
+        i = 0
+        while i < len(lines):
+            if not lines[i].lower().startswith('number of jobs'):
+                i += 1
+                continue
+            num_jobs, num_machines = map(int, lines[i + 1].split()[:2])
+            # lines[i + 2] is the 'processing times :' label
+            rows = lines[i + 3:i + 3 + num_machines]
+            yield np.array([list(map(int, row.split())) for row in rows], dtype=np.int64)
+            i += 3 + num_machines
+        return
+
+    num_jobs, num_machines = map(int, lines[0].split())
+    matrix = np.array([list(map(int, line.split())) for line in lines[1:1 + num_machines]], dtype=np.int64)
+    assert matrix.shape == (num_machines, num_jobs), \
+        f"Expected matrix of shape ({num_machines}, {num_jobs}), got {matrix.shape}"
+    yield matrix
+
+
+def convert(path, out_dir):
+    """Converts a text file to one .fsp file per instance in out_dir and returns the written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    instances = list(read_text(path))
+    written = []
+    for k, matrix in enumerate(instances):
+        name = stem if len(instances) == 1 else f"{stem}_{k + 1}"
+        out_path = os.path.join(out_dir, name + EXTENSION)
+        write_binary(out_path, matrix)
+        written.append(out_path)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert text flow shop instances to the binary .fsp format")
+    parser.add_argument('files', nargs='+', help="text instances (single matrix or Taillard multi-instance files)")
+    parser.add_argument('--out', default='data', help="output directory")
+    args = parser.parse_args()
+
+    for path in args.files:
+        for out_path in convert(path, args.out):
+            print(f"{path} -> {out_path}")
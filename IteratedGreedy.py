@@ -0,0 +1,118 @@
+import math
+import random
+import time
+import numpy as np
+from Optimizer import AbstractOptimizer
+from Problem import FlowShopProblem
+from NEH import neh_sequence, best_insertion
+
+
+def acceptance_temperature(problem, temperature):
+    # constant acceptance temperature of the original paper: T * total processing time / (n * m * 10)
+    total = float(problem.job_processing_times.sum(dtype=np.int64))
+    return max(temperature * total / (problem.num_jobs * problem.num_machines * 10), 1e-8)
+
+
+class IteratedGreedyOptimizer(AbstractOptimizer):
+    """Ruiz & Stützle's Iterated Greedy: destroy d jobs, greedily reinsert them NEH-style, improve the
+    result with an insertion local search and accept it with a constant-temperature criterion.
+
+    Every insertion (reconstruction and local search) scores all positions of a job at once with
+    Taillard's acceleration, O(nm) per job instead of one full evaluation per position.
+    """
+
+    def __init__(self, problem, **params):
+        super().__init__(problem, **params)
+        self.destruction_size = params.get('destruction_size', 4)  # jobs removed per iteration (d)
+        self.temperature = params.get('temperature', 0.4)  # T in the acceptance criterion
+        self.iterations = params.get('iterations', 1000)
+        self.time_limit = params.get('time_limit', None)  # seconds, stops before `iterations` if reached
+        self.local_search = params.get('local_search', True)
+        self.tie_breaking = params.get('tie_breaking', 'first')
+        self.seed = params.get('seed', None)
+        self.acceptance_temperature = acceptance_temperature(problem, self.temperature)
+
+    def optimize(self):
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+        deadline = time.time() + self.time_limit if self.time_limit else None
+
+        current, current_makespan = self._initial_solution()
+        best, best_makespan = current[:], current_makespan
+        self._iteration_done(0, best_makespan)
+
+        for iteration in range(self.iterations):
+            if self._reached_lower_bound(best_makespan) or (deadline and time.time() >= deadline):
+                break
+            current, current_makespan = self._iterate(current, current_makespan)
+            if current_makespan < best_makespan:
+                best, best_makespan = current[:], current_makespan
+            self._iteration_done(iteration + 1, best_makespan)
+
+        self.best_solution = best
+        self.best_makespan = best_makespan
+
+    def _iteration_done(self, iteration, best_makespan):
+        # progress hook, called before the first iteration and after each one
+        pass
+
+    def _initial_solution(self):
+        sequence = neh_sequence(self.problem, self.tie_breaking)
+        makespan = self.problem.evaluate(sequence)
+        if self.local_search:
+            sequence, makespan = self._insertion_local_search(sequence, makespan)
+        return sequence, makespan
+
+    def _iterate(self, current, current_makespan):
+        # destruction: d distinct jobs taken out at random, reconstruction: each one put back at its best position
+        candidate, makespan = current[:], current_makespan
+        removed = [candidate.pop(random.randrange(len(candidate)))
+                   for _ in range(min(self.destruction_size, len(candidate) - 1))]
+        for job in removed:
+            position, makespan = best_insertion(self.problem, candidate, job, self.tie_breaking)
+            candidate.insert(position, job)
+
+        if self.local_search:
+            candidate, makespan = self._insertion_local_search(candidate, makespan)
+
+        if makespan < current_makespan or random.random() < math.exp(-(makespan - current_makespan) / self.acceptance_temperature):
+            return candidate, makespan
+        return current, current_makespan
+
+    def _insertion_local_search(self, sequence, makespan):
+        # remove every job in turn (random order) and reinsert it at its best position, until a full pass finds nothing
+        improved = True
+        while improved:
+            improved = False
+            for job in random.sample(sequence, len(sequence)):
+                reduced = sequence[:]
+                reduced.remove(job)
+                position, new_makespan = best_insertion(self.problem, reduced, job, self.tie_breaking)
+                if new_makespan < makespan:
+                    reduced.insert(position, job)
+                    sequence, makespan = reduced, new_makespan
+                    improved = True
+        return sequence, makespan
+
+    @classmethod
+    def suggest_params(cls, trial):
+        return {
+            'destruction_size': trial.suggest_int('destruction_size', 2, 8),
+            'temperature': trial.suggest_float('temperature', 0.1, 1.0),
+            'iterations': trial.suggest_int('iterations', 100, 5000),
+            'local_search': trial.suggest_categorical('local_search', [True, False]),
+            'tie_breaking': trial.suggest_categorical('tie_breaking', ['first', 'last', 'random']),
+            'seed': trial.suggest_int('seed', 0, 10000),
+        }
+
+
+if __name__ == "__main__":
+    problem = FlowShopProblem('./data/50_20_1.txt')
+    optimizer = IteratedGreedyOptimizer(problem, destruction_size=4, temperature=0.4, time_limit=10, seed=42)
+    optimizer.run()
+    results = optimizer.get_results()
+    print(f"Best makespan: {results['makespan']}")
+    print(f"Best schedule: {results['schedule']}")
+    print(f"Gap to lower bound: {results['gap']:.2%}")
+    print(f"Execution time: {results['execution_time']:.4f}s")
@@ -1,60 +1,250 @@
+import contextlib
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import random
 from scipy.spatial.distance import euclidean
 from Optimizer import AbstractOptimizer
 import optuna
-from Problem import FlowShopProblem
+from Problem import FlowShopProblem, IncrementalEvaluator, swap_neighbors
+from NEH import insertion_makespans
+from IteratedGreedy import acceptance_temperature
 
 
 class LocalSearchOptimizer(AbstractOptimizer):
+    # upper bound on the number of job entries held by one chunk of neighbors
+    MAX_CHUNK_ENTRIES = 1 << 20
+    # swaps in the first batch scored by first improvement, each later batch is 4x the previous one
+    FIRST_IMPROVEMENT_CHUNK = 8
+
     def __init__(self, problem, **params):
         super().__init__(problem, **params)
         # Set local search parameters
         self.neighborhood_size = params.get('neighborhood_size', 10)  # Number of neighbors to explore
         self.step_size = params.get('step_size', 1)  # Perturbation size for swapping jobs
+        self.workers = params.get('workers', 1)  # Threads scoring chunks of the neighborhood
+        self.chunk_size = params.get('chunk_size', None)  # Neighbors per chunk, sized from MAX_CHUNK_ENTRIES by default
+        self.first_improvement = params.get('first_improvement', False)  # Take the first improving move instead of the best (pays off with insertion, swap stays slower)
+        self.neighborhood = params.get('neighborhood', 'swap')  # 'swap' or 'insertion'
+        # Iterated local search: perturb the local optimum with `step_size` random moves and descend again
+        self.ils_iterations = params.get('ils_iterations', 0)  # 0 keeps the single descent
+        self.time_limit = params.get('time_limit', None)  # seconds, ends the perturbation rounds early
+        self.acceptance = params.get('acceptance', 'better')  # 'better' (or equal) or 'temperature'
+        self.temperature = params.get('temperature', 0.4)
+        self.acceptance_temperature = acceptance_temperature(problem, self.temperature)  # same as Iterated Greedy
 
     def optimize(self):
         # Start with a random permutation of jobs
         current_solution = list(np.random.permutation(self.problem.num_jobs))
-        # Evaluate the initial solution and extract only the makespan (first value of the tuple)
-        current_makespan = self.problem.evaluate(current_solution)
-
-        # Explore the neighborhood for a maximum of `neighborhood_size` iterations
-        for _ in range(self.neighborhood_size):
-            best_neighbor = current_solution
-            best_makespan = current_makespan
-
-            # Generate neighbors by swapping two jobs in the current solution
-            for i in range(self.problem.num_jobs):
-                for j in range(i + 1, self.problem.num_jobs):
-                    neighbor = current_solution[:]
-                    neighbor[i], neighbor[j] = neighbor[j], neighbor[i]  # Swap
-                    # Evaluate the neighbor and extract the makespan
-                    makespan = self.problem.evaluate(neighbor)
-
-                    if makespan < best_makespan:
-                        best_makespan = makespan
-                        best_neighbor = neighbor
-
-            # If a better neighbor is found, update the current solution
-            if best_makespan < current_makespan:
-                current_solution = best_neighbor
-                current_makespan = best_makespan
+        # Evaluate the initial solution and keep its completion-time prefix for the neighbor evaluations
+        evaluator = IncrementalEvaluator(self.problem, current_solution)
+
+        deadline = time.time() + self.time_limit if self.time_limit else None
+
+        with self._neighborhood_pool() as pool:
+            # Make at most `neighborhood_size` improving moves, the generator ends at a local optimum
+            for _, current_makespan in zip(range(self.neighborhood_size), self._improving_moves(evaluator, pool)):
+                if self._reached_lower_bound(current_makespan):
+                    break
+
+            best_solution, best_makespan = evaluator.sequence[:], evaluator.makespan
+            current_solution, current_makespan = best_solution, best_makespan
+            for _ in range(self.ils_iterations):
+                if self._reached_lower_bound(best_makespan) or (deadline and time.time() >= deadline):
+                    break
+                current_solution, current_makespan = self._perturb_and_descend(evaluator, pool, current_solution, current_makespan)
+                if current_makespan < best_makespan:
+                    best_solution, best_makespan = current_solution, current_makespan
 
         # Store the best solution found
-        self.best_solution = current_solution
-        self.best_makespan = current_makespan
+        self.best_solution = best_solution
+        self.best_makespan = best_makespan
+
+    def _perturb_and_descend(self, evaluator, pool, current_solution, current_makespan):
+        """One iterated local search round from the evaluator's sequence (the current solution).
+
+        Returns the new current solution and makespan; on rejection the evaluator is put back on
+        current_solution.
+        """
+        n = len(evaluator.sequence)
+        sequence = evaluator.sequence[:]
+        start = n
+        touched = set()  # jobs at or next to a perturbed position, the only ones the descent has to look at
+        for _ in range(self.step_size if n > 1 else 0):
+            i, j = random.sample(range(n), 2)
+            if self.neighborhood == 'insertion':
+                sequence.insert(j, sequence.pop(i))
+            else:
+                sequence[i], sequence[j] = sequence[j], sequence[i]
+            start = min(start, i, j)
+            touched.update(sequence[pos] for pos in (i - 1, i, i + 1, j - 1, j, j + 1) if 0 <= pos < n)
+        evaluator.accept(sequence, start)
+        for _, makespan in zip(range(self.neighborhood_size), self._improving_moves(evaluator, pool, touched)):
+            if self._reached_lower_bound(makespan):
+                break
+
+        if self._accept(evaluator.makespan, current_makespan):
+            return evaluator.sequence[:], evaluator.makespan
+        # only the positions after the common prefix need to be re-simulated
+        start = next((k for k in range(n) if evaluator.sequence[k] != current_solution[k]), n)
+        evaluator.accept(current_solution, start)
+        return current_solution, current_makespan
+
+    def _accept(self, makespan, current_makespan):
+        if makespan <= current_makespan:
+            return True
+        if self.acceptance == 'temperature':
+            return random.random() < math.exp(-(makespan - current_makespan) / self.acceptance_temperature)
+        return False
+
+    def _improving_moves(self, evaluator, pool=None, awake=None):
+        """Applies improving moves to the evaluator's sequence, yielding the makespan after each one.
+
+        With first improvement, awake limits the jobs checked at first (all of them when None), the
+        others only get looked at once a move lands next to them.
+        """
+        if self.first_improvement:
+            yield from self._first_improvement_moves(evaluator, awake)
+            return
+
+        while True:
+            if self.neighborhood == 'insertion':
+                best_makespan, i, j = self._best_insertion(evaluator)
+            else:
+                best_makespan, i, j = self._best_swap(evaluator, pool)
+            # No improving neighbor: the current solution is a local optimum
+            if best_makespan >= evaluator.makespan:
+                return
+            self._apply_move(evaluator, i, j)
+            yield evaluator.makespan
+
+    def _first_improvement_moves(self, evaluator, awake=None):
+        # Jobs are scanned in a random order and each one commits to the first improving move found
+        # for it. A job whose moves don't improve gets its don't-look bit set and is skipped until a
+        # move next to its position wakes it up again; all bits set means a local optimum.
+        n = len(evaluator.sequence)
+        dont_look = np.zeros(n, dtype=bool)
+        if awake is not None:
+            dont_look[:] = True
+            dont_look[list(awake)] = False
+        while not dont_look.all():
+            for job in np.random.permutation(n):
+                if dont_look[job]:
+                    continue
+                move = self._first_improving_move(evaluator, evaluator.sequence.index(job))
+                if move is None:
+                    dont_look[job] = True
+                    continue
+                i, j = move
+                self._apply_move(evaluator, i, j)
+                for pos in {i - 1, i, i + 1, j - 1, j, j + 1}:
+                    if 0 <= pos < n:
+                        dont_look[evaluator.sequence[pos]] = False
+                yield evaluator.makespan
+
+    def _first_improving_move(self, evaluator, i):
+        """First improving move of the job at position i, candidates taken in a random order, or None."""
+        n = len(evaluator.sequence)
+        if self.neighborhood == 'insertion':
+            # Taillard's pass scores every position of the job for about the cost of one evaluation,
+            # so all of them are scored up front and only the pick follows the random order
+            job = evaluator.sequence[i]
+            reduced = evaluator.sequence[:i] + evaluator.sequence[i + 1:]
+            makespans = insertion_makespans(self.problem, reduced, job)
+            evaluator.evaluations += len(makespans)
+            for j in np.random.permutation(n):
+                if makespans[j] < evaluator.makespan:
+                    return i, int(j)
+            return None
+
+        # swaps are scored in the random order, a few at first and in chunks growing 4x after that, stopping
+        # at the first chunk that improves: an early hit costs a handful of evaluations and a job without
+        # improving swap still needs only O(log n) batched calls
+        targets = np.random.permutation(np.delete(np.arange(n), i))
+        solution = np.asarray(evaluator.sequence, dtype=np.intp)
+        s, size = 0, self.FIRST_IMPROVEMENT_CHUNK
+        while s < len(targets):
+            chunk = targets[s:s + size]
+            s, size = s + size, size * 4
+            neighbors = swap_neighbors(solution, np.full(len(chunk), i), chunk)
+            makespans = evaluator.evaluate_batch_from(neighbors, np.minimum(chunk, i))
+            improving = np.flatnonzero(makespans < evaluator.makespan)
+            if len(improving):
+                return i, int(chunk[improving[0]])
+        return None
+
+    def _best_insertion(self, evaluator):
+        """Best move of one job to another position as (makespan, i, j), scored with Taillard's insertion."""
+        best_makespan, best_i, best_j = float('inf'), 0, 0
+        for i, job in enumerate(evaluator.sequence):
+            reduced = evaluator.sequence[:i] + evaluator.sequence[i + 1:]
+            makespans = insertion_makespans(self.problem, reduced, job)
+            evaluator.evaluations += len(makespans)
+            makespans[i] = np.iinfo(makespans.dtype).max  # putting the job back where it was
+            j = int(np.argmin(makespans))
+            if makespans[j] < best_makespan:
+                best_makespan, best_i, best_j = int(makespans[j]), i, j
+        return best_makespan, best_i, best_j
+
+    def _apply_move(self, evaluator, i, j):
+        # swap positions i and j, or move the job at position i to position j
+        sequence = evaluator.sequence[:]
+        if self.neighborhood == 'insertion':
+            sequence.insert(j, sequence.pop(i))
+        else:
+            sequence[i], sequence[j] = sequence[j], sequence[i]
+        evaluator.accept(sequence, min(i, j))
+
+    def _neighborhood_pool(self):
+        # numpy releases the GIL inside the batched recurrence, so chunks can be scored on threads
+        if self.workers > 1:
+            return ThreadPoolExecutor(max_workers=self.workers)
+        return contextlib.nullcontext()
+
+    def _best_swap(self, evaluator, pool=None):
+        """Best swap of the current solution as (makespan, i, j), ties going to the first pair (i, j).
+
+        The n(n-1)/2 swaps are generated and scored chunk by chunk, so memory stays bounded on large
+        instances and no Python list is built per neighbor.
+        """
+        n = len(evaluator.sequence)
+        rows, cols = np.triu_indices(n, k=1)
+        chunk_size = self.chunk_size or max(1, self.MAX_CHUNK_ENTRIES // n)
+        chunks = [(s, min(s + chunk_size, len(rows))) for s in range(0, len(rows), chunk_size)]
+        solution = np.asarray(evaluator.sequence, dtype=np.intp)
+
+        def score(chunk):
+            s, e = chunk
+            neighbors = swap_neighbors(solution, rows[s:e], cols[s:e])
+            makespans = evaluator.evaluate_batch_from(neighbors, rows[s:e])
+            k = int(np.argmin(makespans))
+            return int(makespans[k]), s + k
 
+        results = pool.map(score, chunks) if pool is not None else map(score, chunks)
+        best_makespan, best_idx = float('inf'), -1
+        for makespan, idx in results:
+            if makespan < best_makespan:
+                best_makespan, best_idx = makespan, idx
+        if best_idx < 0:
+            return best_makespan, 0, 0  # fewer than two jobs, no swap to make
+        return best_makespan, int(rows[best_idx]), int(cols[best_idx])
 
     @classmethod
     def suggest_params(cls, trial):
         """
         Suggest parameters using Optuna. This includes the number of
-        iterations (neighborhood size) and perturbation step size.
+        iterations (neighborhood size), the perturbation step size and
+        the iterated local search settings.
         """
         return {
             'neighborhood_size': trial.suggest_int('neighborhood_size', 5, 50),
-            'step_size': trial.suggest_int('step_size', 1, 5),  # Can be used for more complex perturbation
+            'step_size': trial.suggest_int('step_size', 1, 5),  # Random moves per perturbation of the local optimum
+            'first_improvement': trial.suggest_categorical('first_improvement', [False, True]),
+            'neighborhood': trial.suggest_categorical('neighborhood', ['swap', 'insertion']),
+            'ils_iterations': trial.suggest_int('ils_iterations', 0, 200),
+            'acceptance': trial.suggest_categorical('acceptance', ['better', 'temperature']),
+            'temperature': trial.suggest_float('temperature', 0.1, 1.0),
         }
         
         
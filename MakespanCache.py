@@ -0,0 +1,108 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+class MakespanCache:
+    """Size-bounded LRU memo of makespans wrapped around a FlowShopProblem.
+
+    evaluate and evaluate_batch look the permutation up before simulating it; every other
+    attribute is forwarded to the wrapped problem, so the cache can be handed to any optimizer
+    in place of the problem itself. Neighbors scored in batches by IncrementalEvaluator.evaluate_batch_from
+    (local search, tabu search) are not looked up here, so they are not part of the statistics.
+    """
+
+    def __init__(self, problem, max_entries=100000, key='bytes'):
+        if max_entries <= 0:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        if key not in ('bytes', 'hash'):
+            raise ValueError(f"Unknown cache key type: {key}")
+        self.problem = problem
+        self.max_entries = max_entries
+        self.key = key
+        # two bytes per job is enough unless the instance has more than 65535 jobs
+        self._key_dtype = np.uint16 if problem.num_jobs <= np.iinfo(np.uint16).max else np.uint32
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getattr__(self, name):
+        if name == 'problem':
+            # only reached before __init__ ran (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.problem, name)
+
+    def _key(self, permutation):
+        # raw bytes of the permutation, or a 16-byte digest of them for long permutations
+        raw = np.asarray(permutation, dtype=self._key_dtype).tobytes()
+        if self.key == 'hash':
+            return hashlib.blake2b(raw, digest_size=16).digest()
+        return raw
+
+    def _lookup(self, key):
+        makespan = self._entries.get(key)
+        if makespan is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return makespan
+
+    def _store(self, key, makespan):
+        self._entries[key] = makespan
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, permutation):
+        return self._lookup(self._key(permutation))
+
+    def put(self, permutation, makespan):
+        self._store(self._key(permutation), makespan)
+
+    def evaluate(self, permutation):
+        key = self._key(permutation)
+        makespan = self._lookup(key)
+        if makespan is None:
+            makespan = self.problem.evaluate(permutation)
+            self._store(key, makespan)
+        return makespan
+
+    def evaluate_batch(self, permutations):
+        permutations = np.asarray(permutations, dtype=np.intp)
+        if permutations.ndim != 2:
+            raise ValueError(f"Expected a 2-D array of permutations, got shape {permutations.shape}")
+        makespans = np.empty(permutations.shape[0], dtype=np.int64)
+        keys = [self._key(row) for row in permutations]
+        missing = []
+        for r, key in enumerate(keys):
+            makespan = self._lookup(key)
+            if makespan is None:
+                missing.append(r)
+            else:
+                makespans[r] = makespan
+        if missing:
+            # duplicates inside the batch are simulated once per occurrence but stored once
+            makespans[missing] = self.problem.evaluate_batch(permutations[missing])
+            for r in missing:
+                self._store(keys[r], int(makespans[r]))
+        return makespans
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries
+        }
@@ -0,0 +1,61 @@
+import random
+import numpy as np
+from Problem import completion_matrix
+
+
+# Taillard's acceleration of the NEH insertion step: with the heads e (earliest completion of the
+# first i jobs), the tails q (time from the start of job i to the end of the sequence) and the
+# completion times f of the inserted job, the makespans of all k+1 insertion positions come out
+# of one O(km) pass instead of k+1 full evaluations.
+
+TIE_BREAKING = ['first', 'last', 'random']
+
+
+def _tails(times):
+    # the tails are the heads of the sequence reversed in both jobs and machines
+    return completion_matrix(times[::-1, ::-1])[::-1, ::-1]
+
+
+def insertion_makespans(problem, sequence, job):
+    """Makespans of inserting job before position 0..len(sequence) of sequence."""
+    p_new = problem.job_processing_times[job].astype(np.int64)
+    k = len(sequence)
+    heads = np.zeros((k + 1, problem.num_machines), dtype=np.int64)
+    tails = np.zeros((k + 1, problem.num_machines), dtype=np.int64)
+    if k:
+        times = problem.job_processing_times[np.asarray(sequence, dtype=np.intp)].astype(np.int64)
+        heads[1:] = completion_matrix(times)
+        tails[:-1] = _tails(times)
+
+    # f[i][j] = max(f[i][j-1], e[i-1][j]) + p_new[j], solved for every position at once
+    cumulative = np.cumsum(p_new)
+    inserted = cumulative + np.maximum.accumulate(heads - (cumulative - p_new), axis=1)
+    return np.max(inserted + tails, axis=1)
+
+
+def best_insertion(problem, sequence, job, tie_breaking='first'):
+    makespans = insertion_makespans(problem, sequence, job)
+    best = makespans.min()
+    if tie_breaking == 'first':
+        position = int(np.argmax(makespans == best))
+    elif tie_breaking == 'last':
+        position = len(makespans) - 1 - int(np.argmax(makespans[::-1] == best))
+    elif tie_breaking == 'random':
+        position = int(random.choice(np.flatnonzero(makespans == best)))
+    else:
+        raise ValueError(f"Unknown tie breaking rule: {tie_breaking}")
+    return position, int(best)
+
+
+def neh_sequence(problem, tie_breaking='first', order=None):
+    """NEH construction; jobs are inserted by decreasing total processing time unless order is given."""
+    if order is None:
+        totals = problem.job_processing_times.sum(axis=1, dtype=np.int64)
+        order = np.argsort(-totals, kind='stable')
+    order = [int(j) for j in order]
+
+    sequence = [order[0]]
+    for job in order[1:]:
+        position, _ = best_insertion(problem, sequence, job, tie_breaking)
+        sequence.insert(position, job)
+    return sequence
@@ -1,14 +1,21 @@
 from abc import ABC, abstractmethod
 import time
 from Problem import FlowShopProblem
+from MakespanCache import MakespanCache
 
 class AbstractOptimizer(ABC):
     def __init__(self, problem, **params):
+        # optional LRU memo of makespans, enabled by giving it a maximum number of entries
+        cache_size = params.get('cache_size', 0)
+        if cache_size:
+            problem = MakespanCache(problem, max_entries=cache_size, key=params.get('cache_key', 'bytes'))
         self.problem = problem
         self.params = params
         self.best_solution = None
         self.best_makespan = float('inf')
         self.execution_time = 0.0
+        # the lower bound can't be beaten, so a run that reaches it has a proven optimum and stops
+        self.stop_at_lower_bound = params.get('stop_at_lower_bound', True)
 
 
     @abstractmethod
@@ -29,10 +36,27 @@ class AbstractOptimizer(ABC):
         self.optimize()
         self.execution_time = time.time() - start_time
 
+    def _reached_lower_bound(self, makespan):
+        return self.stop_at_lower_bound and makespan <= self.problem.lower_bound
+
+    def optimality_gap(self):
+        # relative distance of the best makespan to the instance's lower bound (0.0 = proven optimal)
+        if self.best_solution is None:
+            return None
+        lower_bound = self.problem.lower_bound
+        return (float(self.best_makespan) - lower_bound) / lower_bound
+
     def get_results(self):
       
-        return {
+        results = {
             'schedule': self.best_solution,
             'makespan': self.best_makespan,
-            'execution_time': self.execution_time
+            'execution_time': self.execution_time,
+            'lower_bound': self.problem.lower_bound,
+            'gap': self.optimality_gap()
         }
+        if isinstance(self.problem, MakespanCache):
+            # lookups of evaluate, evaluate_batch and IncrementalEvaluator.evaluate_from only,
+            # batched incremental scoring doesn't use the cache
+            results['cache'] = self.problem.stats()
+        return results
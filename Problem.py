@@ -1,12 +1,77 @@
+import copy
+import threading
 import numpy as np
 import time
+from MakespanCache import MakespanCache
+import InstanceStore
+
+def completion_matrix(times):
+    """Completion times of a (num_positions, num_machines) matrix of processing times taken in order.
+
+    C[i][j] = max(C[i-1][j], C[i][j-1]) + p[i][j], swept machine by machine: along the positions the
+    recurrence is C[:, j] = S + max.accumulate(C[:, j-1] - S_before), with S the cumulative sum of
+    column j, so the cost is one vectorized pass per machine.
+    """
+    completion = np.empty_like(times)
+    cumulative = np.cumsum(times, axis=0)
+    before = cumulative - times
+    previous = np.zeros(times.shape[0], dtype=times.dtype)
+    for j in range(times.shape[1]):
+        previous = cumulative[:, j] + np.maximum.accumulate(previous - before[:, j])
+        completion[:, j] = previous
+    return completion
+
+
+def swap_neighbors(solution, rows, cols):
+    """Rows of solution (an int array) with positions rows[k] and cols[k] swapped in row k, for evaluate_batch_from."""
+    neighbors = np.tile(solution, (len(rows), 1))
+    idx = np.arange(len(rows))
+    neighbors[idx, rows], neighbors[idx, cols] = solution[cols], solution[rows]
+    return neighbors
+
+
+class Schedule:
+    """Timetable of a sequence: start and completion times of every (position, machine) pair.
+
+    machine_idle_time counts the gaps on each machine between its first start and its last
+    completion; flow_times is indexed by job and holds each job's completion on the last machine.
+    """
+
+    def __init__(self, sequence, times, completion_times, num_jobs):
+        self.sequence = sequence
+        self.processing_times = times
+        self.completion_times = completion_times
+        self.start_times = completion_times - times
+        self.makespan = int(completion_times[-1, -1])
+        self.machine_idle_time = completion_times[-1] - self.start_times[0] - times.sum(axis=0)
+        self.flow_times = np.zeros(num_jobs, dtype=np.int64)
+        self.flow_times[sequence] = completion_times[:, -1]
+        self.total_flow_time = int(self.flow_times.sum())
+
+    def to_dict(self):
+        return {
+            'sequence': self.sequence.tolist(),
+            'makespan': self.makespan,
+            'start_times': self.start_times.tolist(),
+            'completion_times': self.completion_times.tolist(),
+            'machine_idle_time': self.machine_idle_time.tolist(),
+            'flow_times': self.flow_times.tolist(),
+            'total_flow_time': self.total_flow_time
+        }
+
 
 class FlowShopProblem:
     def __init__(self, filepath):
         self.processing_times = self._read_file(filepath)
         self.num_machines, self.num_jobs = self.processing_times.shape
+        self._build_evaluation_tables()
+        self._lower_bound = None
 
     def _read_file(self, filepath):
+        if filepath.endswith(InstanceStore.EXTENSION):
+            # binary instances are memory-mapped job-major, the transpose is a view with the usual layout
+            return InstanceStore.open_binary(filepath).T
+
         with open(filepath, 'r') as file:
             lines = file.readlines()
 
@@ -14,39 +79,95 @@ class FlowShopProblem:
 
         matrix = [list(map(int, line.strip().split())) for line in lines[1:]]
 
-        matrix_np = np.array(matrix)
+        matrix_np = np.array(matrix, dtype=np.int64)
         assert matrix_np.shape == (num_machines, num_jobs), \
             f"Expected matrix of shape ({num_machines}, {num_jobs}), got {matrix_np.shape}"
         return matrix_np
 
+    def _build_evaluation_tables(self):
+        # job-major copy of the processing times: row j holds the times of job j on every machine,
+        # so the recurrence below walks one contiguous row per job
+        self.job_processing_times = np.ascontiguousarray(self.processing_times.T)
+        # plain python ints are much cheaper than numpy scalars inside the per-cell loop
+        self._job_rows = tuple(tuple(int(p) for p in row) for row in self.job_processing_times)
+        # rolling completion-time row reused by every call to evaluate
+        self._front = [0] * self.num_machines
+        # prefix sums along the machines, used by the vectorized recurrence in evaluate_batch
+        self._job_cumsum = np.cumsum(self.job_processing_times, axis=1, dtype=np.int64)
+        self._job_cumsum_before = self._job_cumsum - self.job_processing_times
+
     def evaluate(self, permutation):
-        start_time = time.time()
+        # C[i][k] = max(C[i-1][k], C[i][k-1]) + p[k][job_i], kept as a single row of machine
+        # completion times that is overwritten in place job after job
+        rows = self._job_rows
+        front = self._front
+        machines = range(self.num_machines)
+        for k in machines:
+            front[k] = 0
+
+        for job in permutation:
+            times = rows[job]
+            t = 0
+            for k in machines:
+                c = front[k]
+                t = (c if c > t else t) + times[k]
+                front[k] = t
+
+        return front[-1]
+
+    def evaluate_batch(self, permutations):
+        # permutations is a (K, L) integer array, one (possibly partial) sequence per row.
+        # The job loop runs once for the whole batch; the machine recurrence of each step is
+        # C[k] = P[k] + max_{l<=k}(C_prev[l] - P[l-1]) with P the machine prefix sums of the job,
+        # which numpy evaluates for all K rows with a single maximum.accumulate.
+        permutations = np.asarray(permutations, dtype=np.intp)
+        if permutations.ndim != 2:
+            raise ValueError(f"Expected a 2-D array of permutations, got shape {permutations.shape}")
+
+        front = np.zeros((permutations.shape[0], self.num_machines), dtype=np.int64)
+        for i in range(permutations.shape[1]):
+            self._batch_step(front, permutations[:, i])
+
+        return front[:, -1]
+
+    def _batch_step(self, front, jobs):
+        # appends jobs[r] to row r of front, in place
+        np.subtract(front, self._job_cumsum_before[jobs], out=front)
+        np.maximum.accumulate(front, axis=1, out=front)
+        front += self._job_cumsum[jobs]
 
-        num_jobs = len(permutation)
-        completion_times = np.zeros((num_jobs, self.num_machines))
 
-        for i, job in enumerate(permutation):
-            for machine in range(self.num_machines):
-                processing_time = self.processing_times[machine][job]
+    @property
+    def lower_bound(self):
+        # Taillard's bound, computed on first use and kept for the lifetime of the instance
+        if self._lower_bound is None:
+            self._lower_bound = max(self.machine_lower_bound(), self.job_lower_bound())
+        return self._lower_bound
 
-                if i == 0 and machine == 0:
-                    completion_times[i][machine] = processing_time
-                elif i == 0:
-                    completion_times[i][machine] = completion_times[i][machine - 1] + processing_time
-                elif machine == 0:
-                    completion_times[i][machine] = completion_times[i - 1][machine] + processing_time
-                else:
-                    completion_times[i][machine] = max(
-                        completion_times[i - 1][machine],
-                        completion_times[i][machine - 1]
-                    ) + processing_time
+    def machine_lower_bound(self):
+        # machine i can't start before the smallest head (work on machines < i) of any job, and its
+        # last job still needs the smallest tail (work on machines > i) after it
+        p = self.job_processing_times.astype(np.int64)
+        before = np.cumsum(p, axis=1) - p
+        after = p.sum(axis=1, keepdims=True) - before - p
+        return int(np.max(before.min(axis=0) + p.sum(axis=0) + after.min(axis=0)))
 
-        makespan = completion_times[-1][-1]
-        end_time = time.time()
-        execution_time = end_time - start_time
+    def job_lower_bound(self):
+        # no job can finish before its own total processing time
+        return int(self.job_processing_times.sum(axis=1, dtype=np.int64).max())
 
-        return makespan
+    def schedule(self, permutation):
+        # full timetable in a single pass, for reporting (the optimizers only need evaluate)
+        sequence = np.asarray(permutation, dtype=np.intp)
+        times = self.job_processing_times[sequence].astype(np.int64)
+        return Schedule(sequence, times, completion_matrix(times), self.num_jobs)
 
+    def copy(self):
+        # shares the (read-only) instance data and tables, but gets its own evaluation buffer so
+        # copies can be evaluated from different threads
+        clone = copy.copy(self)
+        clone._front = [0] * self.num_machines
+        return clone
 
     def get_num_jobs(self):
         return self.num_jobs
@@ -56,3 +177,140 @@ class FlowShopProblem:
 
     def get_processing_times(self):
         return self.processing_times.copy()
+
+
+class IncrementalEvaluator:
+    """Makespan evaluation of moves around a current sequence.
+
+    The machine completion times after every position of the current sequence are cached, so a
+    neighbor that only differs from position `start` onward is simulated from there instead of
+    from job 0. accept() replaces the current sequence and recomputes the cache from `start`, or
+    reuses the completion times of the neighbor evaluate_from has just simulated.
+    """
+
+    def __init__(self, problem, sequence):
+        self.problem = problem
+        # single moves go through the problem's makespan memo when it is wrapped in one
+        self._cache = problem if isinstance(problem, MakespanCache) else None
+        self.sequence = [int(j) for j in sequence]
+        self._fronts = [[0] * problem.num_machines]
+        self._fronts_array = None
+        self._last_neighbor = None  # (sequence, start, fronts) of the last neighbor simulated by evaluate_from
+        self._extend_fronts(0)
+        # neighbors scored through this evaluator (callers scoring moves by other means add theirs)
+        self.evaluations = 0
+        # evaluate_batch_from may be called from several threads at once (LocalSearch's swap chunks)
+        self._batch_lock = threading.Lock()
+
+    @property
+    def makespan(self):
+        return self._fronts[-1][-1]
+
+    def _extend_fronts(self, start):
+        # _fronts[i] holds the completion times on every machine after the first i jobs
+        rows = self.problem._job_rows
+        machines = range(self.problem.num_machines)
+        del self._fronts[start + 1:]
+        front = self._fronts[start][:]
+        for job in self.sequence[start:]:
+            times = rows[job]
+            t = 0
+            for k in machines:
+                c = front[k]
+                t = (c if c > t else t) + times[k]
+                front[k] = t
+            self._fronts.append(front[:])
+        self._fronts_array = None
+
+    def evaluate_from(self, sequence, start):
+        """Makespan of sequence, which must share its first `start` jobs with the current one."""
+        self.evaluations += 1
+        if self._cache is not None:
+            makespan = self._cache.get(sequence)
+            if makespan is None:
+                makespan = self._simulate_from(sequence, start)
+                self._cache.put(sequence, makespan)
+            return makespan
+        return self._simulate_from(sequence, start)
+
+    def _simulate_from(self, sequence, start):
+        rows = self.problem._job_rows
+        machines = range(self.problem.num_machines)
+        front = self._fronts[start][:]
+        fronts = []
+        for i in range(start, len(sequence)):
+            times = rows[sequence[i]]
+            t = 0
+            for k in machines:
+                c = front[k]
+                t = (c if c > t else t) + times[k]
+                front[k] = t
+            fronts.append(front[:])
+        # kept so that accepting this neighbor right away doesn't simulate its suffix a second time
+        self._last_neighbor = (list(sequence), start, fronts)
+        return front[-1]
+
+    def swap(self, a, b):
+        """Neighbor obtained by swapping positions a and b, and its makespan."""
+        neighbor = self.sequence[:]
+        neighbor[a], neighbor[b] = neighbor[b], neighbor[a]
+        return neighbor, self.evaluate_from(neighbor, min(a, b))
+
+    def insertion(self, src, dst):
+        """Neighbor obtained by moving the job at position src to position dst, and its makespan."""
+        neighbor = self.sequence[:]
+        neighbor.insert(dst, neighbor.pop(src))
+        return neighbor, self.evaluate_from(neighbor, min(src, dst))
+
+    def evaluate_batch_from(self, sequences, starts):
+        """Batched evaluate_from: row r of sequences shares its first starts[r] jobs with the current one.
+
+        Unlike evaluate_from, this never goes through the problem's MakespanCache: the rows are
+        simulated from their cached prefix directly and don't show in the cache's hit/miss counts.
+        """
+        sequences = np.asarray(sequences, dtype=np.intp)
+        starts = np.asarray(starts, dtype=np.intp)
+        with self._batch_lock:
+            self.evaluations += len(sequences)
+            if self._fronts_array is None:
+                self._fronts_array = np.array(self._fronts, dtype=np.int64)
+            fronts = self._fronts_array
+
+        # rows are sorted by start so that the rows still waiting for their first changed
+        # position are always a suffix and each step only touches a leading slice
+        order = np.argsort(starts, kind='stable')
+        sequences = sequences[order]
+        starts = starts[order]
+        front = fronts[starts]
+        first = int(starts[0]) if len(starts) else 0
+        active = np.searchsorted(starts, np.arange(first, sequences.shape[1]), side='right').tolist()
+        for i, rows in enumerate(active, first):
+            self.problem._batch_step(front[:rows], sequences[:rows, i])
+
+        makespans = np.empty(len(order), dtype=np.int64)
+        makespans[order] = front[:, -1]
+        return makespans
+
+    def accept(self, sequence, start=0):
+        """Make sequence the current one; it must share its first `start` jobs with the old one."""
+        self.sequence = [int(j) for j in sequence]
+        last, self._last_neighbor = self._last_neighbor, None
+        if last is not None and last[1] == start and last[0] == self.sequence:
+            del self._fronts[start + 1:]
+            self._fronts.extend(last[2])
+            self._fronts_array = None
+        else:
+            self._extend_fronts(start)
+
+
+if __name__ == "__main__":
+    # throughput of evaluate on the bundled 50x20 instances
+    rng = np.random.default_rng(0)
+    for path in ['./data/50_20_1.txt', './data/50_20_2.txt']:
+        problem = FlowShopProblem(path)
+        perms = [rng.permutation(problem.num_jobs).tolist() for _ in range(2000)]
+        start_time = time.perf_counter()
+        for perm in perms:
+            problem.evaluate(perm)
+        elapsed = time.perf_counter() - start_time
+        print(f"{path}: {len(perms) / elapsed:.0f} evaluations/s")
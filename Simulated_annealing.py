@@ -1,14 +1,15 @@
-import numpy as np
 import random
 import math
 from Optimizer import AbstractOptimizer
-from Problem import FlowShopProblem
+from Problem import FlowShopProblem, IncrementalEvaluator
+from NEH import neh_sequence
 import optuna
 class SimulatedAnnealingOptimizer(AbstractOptimizer):
 
     def optimize(self):
         current_solution = self._neh_heuristic()
-        current_makespan = self.problem.evaluate(current_solution)
+        evaluator = IncrementalEvaluator(self.problem, current_solution)
+        current_makespan = evaluator.makespan
 
         best_solution = current_solution.copy()
         best_makespan = current_makespan
@@ -28,15 +29,16 @@ class SimulatedAnnealingOptimizer(AbstractOptimizer):
         no_improvement_count = 0
 
         for i in range(iterations):
-            # Generate neighbor
-            neighbor = current_solution.copy()
-            a, b = random.sample(range(len(neighbor)), 2)
-            neighbor[a], neighbor[b] = neighbor[b], neighbor[a]
+            if self._reached_lower_bound(best_makespan):
+                break
 
-            neighbor_makespan = self.problem.evaluate(neighbor)
+            # Generate neighbor, only the jobs from the first swapped position onward are re-simulated
+            a, b = random.sample(range(len(current_solution)), 2)
+            neighbor, neighbor_makespan = evaluator.swap(a, b)
             delta = neighbor_makespan - current_makespan
 
             if delta < 0 or random.random() < math.exp(-delta / T):
+                evaluator.accept(neighbor, min(a, b))
                 current_solution = neighbor
                 current_makespan = neighbor_makespan
 
@@ -97,21 +99,7 @@ class SimulatedAnnealingOptimizer(AbstractOptimizer):
         }
 
     def _neh_heuristic(self):
-        job_scores = [(j, np.sum(self.problem.processing_times[:, j])) for j in range(self.problem.num_jobs)]
-        sorted_jobs = [job for job, _ in sorted(job_scores, key=lambda x: x[1], reverse=True)]
-
-        partial_sequence = [sorted_jobs[0]]
-        for job in sorted_jobs[1:]:
-            best_seq = None
-            best_makespan = float("inf")
-            for i in range(len(partial_sequence) + 1):
-                new_seq = partial_sequence[:i] + [job] + partial_sequence[i:]
-                makespan = self.problem.evaluate(new_seq)
-                if makespan < best_makespan:
-                    best_makespan = makespan
-                    best_seq = new_seq
-            partial_sequence = best_seq
-        return partial_sequence
+        return neh_sequence(self.problem, self.params.get("neh_tie_breaking", "first"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import random
+import time
+import numpy as np
+from Optimizer import AbstractOptimizer
+from Problem import FlowShopProblem, IncrementalEvaluator, swap_neighbors
+from NEH import neh_sequence, insertion_makespans
+
+
+class TabuSearchOptimizer(AbstractOptimizer):
+    """Tabu search over the insertion or swap neighborhood, starting from NEH.
+
+    The tabu memory is a (job, position) array holding the iteration until which a job may not
+    be put back at a position it just left, so checking a move is one array lookup. A tabu move is
+    still allowed when it beats the best makespan found so far (aspiration).
+
+    Insertion moves are scored a whole job at a time with Taillard's acceleration and swap moves
+    in batches that re-simulate only from the first changed position. On large instances only
+    `candidate_size` jobs (insertion) or pairs (swap), sampled at random, are scored per iteration.
+    """
+
+    # full neighborhood up to this many jobs when candidate_size isn't given
+    FULL_NEIGHBORHOOD_JOBS = 50
+
+    def __init__(self, problem, **params):
+        super().__init__(problem, **params)
+        self.iterations = params.get('iterations', 1000)
+        self.tenure = params.get('tenure', 7)  # iterations a (job, position) attribute stays tabu
+        self.neighborhood = params.get('neighborhood', 'insertion')  # 'insertion' or 'swap'
+        self.candidate_size = params.get('candidate_size', None)  # jobs/pairs scored per iteration
+        self.time_limit = params.get('time_limit', None)  # seconds, stops before `iterations` if reached
+        self.seed = params.get('seed', None)
+
+    def optimize(self):
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+        deadline = time.time() + self.time_limit if self.time_limit else None
+
+        evaluator = IncrementalEvaluator(self.problem, neh_sequence(self.problem, self.params.get('neh_tie_breaking', 'first')))
+        best_solution, best_makespan = evaluator.sequence[:], evaluator.makespan
+        tabu_until = np.zeros((self.problem.num_jobs, self.problem.num_jobs), dtype=np.int64)
+        self._iteration_done(0, best_makespan)
+
+        for iteration in range(self.iterations):
+            if self._reached_lower_bound(best_makespan) or (deadline and time.time() >= deadline):
+                break
+            move = self._best_admissible_move(evaluator, tabu_until, iteration, best_makespan)
+            if move is None:
+                break
+            i, j = move
+            self._apply_move(evaluator, tabu_until, iteration, i, j)
+            if evaluator.makespan < best_makespan:
+                best_solution, best_makespan = evaluator.sequence[:], evaluator.makespan
+            self._iteration_done(iteration + 1, best_makespan)
+
+        self.best_solution = best_solution
+        self.best_makespan = best_makespan
+
+    def _iteration_done(self, iteration, best_makespan):
+        # progress hook, called before the first iteration and after each one
+        pass
+
+    def _candidate_count(self, full):
+        if self.candidate_size:
+            return min(self.candidate_size, full)
+        if self.problem.num_jobs <= self.FULL_NEIGHBORHOOD_JOBS:
+            return full
+        return min(self.FULL_NEIGHBORHOOD_JOBS, full)
+
+    def _best_admissible_move(self, evaluator, tabu_until, iteration, best_makespan):
+        """Best non-tabu (or aspirating) move among the candidates as (i, j), or None if all are tabu."""
+        if self.neighborhood == 'swap':
+            makespans, rows, cols, tabu = self._score_swaps(evaluator, tabu_until, iteration)
+        else:
+            makespans, rows, cols, tabu = self._score_insertions(evaluator, tabu_until, iteration)
+        if not len(makespans):
+            return None
+        admissible = ~tabu | (makespans < best_makespan)
+        if not admissible.any():
+            return None
+        k = int(np.argmin(np.where(admissible, makespans, np.iinfo(np.int64).max)))
+        return int(rows[k]), int(cols[k])
+
+    def _score_insertions(self, evaluator, tabu_until, iteration):
+        # every position of each candidate job at once; move (i, j) takes the job at position i
+        # out and inserts it before position j of the remaining sequence
+        sequence = evaluator.sequence
+        n = len(sequence)
+        positions = np.random.permutation(n)[:self._candidate_count(n)]
+        makespans, rows, cols, tabu = [], [], [], []
+        for i in positions:
+            job = sequence[i]
+            job_makespans = insertion_makespans(self.problem, sequence[:i] + sequence[i + 1:], job)
+            targets = np.flatnonzero(np.arange(n) != i)  # putting the job back where it was
+            makespans.append(job_makespans[targets])
+            rows.append(np.full(len(targets), i))
+            cols.append(targets)
+            tabu.append(tabu_until[job, targets] > iteration)
+        return np.concatenate(makespans), np.concatenate(rows), np.concatenate(cols), np.concatenate(tabu)
+
+    def _score_swaps(self, evaluator, tabu_until, iteration):
+        n = len(evaluator.sequence)
+        rows, cols = np.triu_indices(n, k=1)
+        count = self._candidate_count(len(rows))
+        if count < len(rows):
+            sample = np.random.choice(len(rows), count, replace=False)
+            rows, cols = rows[sample], cols[sample]
+        solution = np.asarray(evaluator.sequence, dtype=np.intp)
+        makespans = evaluator.evaluate_batch_from(swap_neighbors(solution, rows, cols), rows)
+        # a swap is tabu when it brings either job back to a position it recently left
+        tabu = (tabu_until[solution[rows], cols] > iteration) | (tabu_until[solution[cols], rows] > iteration)
+        return makespans, rows, cols, tabu
+
+    def _apply_move(self, evaluator, tabu_until, iteration, i, j):
+        sequence = evaluator.sequence[:]
+        if self.neighborhood == 'swap':
+            tabu_until[sequence[i], i] = iteration + 1 + self.tenure
+            tabu_until[sequence[j], j] = iteration + 1 + self.tenure
+            sequence[i], sequence[j] = sequence[j], sequence[i]
+        else:
+            tabu_until[sequence[i], i] = iteration + 1 + self.tenure
+            sequence.insert(j, sequence.pop(i))
+        evaluator.accept(sequence, min(i, j))
+
+    @classmethod
+    def suggest_params(cls, trial):
+        return {
+            'iterations': trial.suggest_int('iterations', 100, 5000),
+            'tenure': trial.suggest_int('tenure', 3, 20),
+            'neighborhood': trial.suggest_categorical('neighborhood', ['insertion', 'swap']),
+            'candidate_size': trial.suggest_int('candidate_size', 5, 100),
+            'seed': trial.suggest_int('seed', 0, 10000),
+        }
+
+
+if __name__ == "__main__":
+    problem = FlowShopProblem('./data/50_20_1.txt')
+    optimizer = TabuSearchOptimizer(problem, tenure=7, time_limit=10, seed=42)
+    optimizer.run()
+    results = optimizer.get_results()
+    print(f"Best makespan: {results['makespan']}")
+    print(f"Best schedule: {results['schedule']}")
+    print(f"Gap to lower bound: {results['gap']:.2%}")
+    print(f"Execution time: {results['execution_time']:.4f}s")
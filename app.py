@@ -17,11 +17,17 @@ import math
 import random
 
 # Import our optimization algorithms
-from Problem import FlowShopProblem
+from Problem import IncrementalEvaluator
+from InstanceRegistry import InstanceRegistry
 from AntSystem import AntSystemOptimizer
-from Genetic import GeneticAlgorithmOptimizer, Individual  # Import Individual class
+from FrameRecorder import FrameRecorder
+from HeatmapVideo import encode_in_background
+from Genetic import GeneticAlgorithmOptimizer
 from LocalSearch_simple import LocalSearchOptimizer
 from Simulated_annealing import SimulatedAnnealingOptimizer
+from IteratedGreedy import IteratedGreedyOptimizer
+from TabuSearch import TabuSearchOptimizer
+from BranchAndBound import BranchAndBoundOptimizer
 
 class NumpyEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -41,6 +47,12 @@ socketio = SocketIO(app, cors_allowed_origins="*", json=json)
 results_history = []
 # Store for ongoing optimizations
 ongoing_optimizations = {}
+# Instances loaded from disk, shared by all requests (reloaded when the file changes)
+instance_registry = InstanceRegistry(max_instances=32)
+# Pheromone heatmap animations of Ant System runs (record_video), at most this many frames each
+VIDEO_FOLDER = os.path.join('static', 'videos')
+VIDEO_FRAMES = 150
+VIDEO_FILES = 20  # older animations are deleted, like the results beyond the last 20
 # Store for algorithm descriptions
 algorithm_descriptions = {
     "ant_system": {
@@ -57,7 +69,13 @@ algorithm_descriptions = {
             "m": "Number of ants in the colony",
             "sigma0": "Initial pheromone value",
             "n": "Number of iterations",
-            "e": "Elitism factor (0 = no elitism, higher values increase elitism)"
+            "e": "Elitism factor (0 = no elitism, higher values increase elitism)",
+            "candidate_size": "Ants only consider this many of the best-fitting unscheduled successors of their current job (0 = all jobs, use for large instances)",
+            "mmas": "Keep pheromone values between MAX-MIN Ant System bounds to avoid premature convergence",
+            "local_search": "Improve the best ant of every iteration with a few insertion local search moves",
+            "colonies": "Independent colonies run in parallel worker processes, each with its own pheromone matrix (1 = a single colony)",
+            "exchange_interval": "Iterations between passing each colony's best tour to the next colony (0 = never)",
+            "record_video": "Record the pheromone matrix during the run and show its evolution as an animated heatmap"
         }
     },
     "genetic": {
@@ -72,19 +90,33 @@ algorithm_descriptions = {
             "mutation_rate": "Probability of mutation (0-1)",
             "selection_type": "Method for selecting parents (tournament or roulette wheel)",
             "tournament_size": "Number of individuals in tournament selection",
-            "crossover_type": "Method for crossover (one-point or two-point)",
+            "crossover_type": "Method for crossover (one-point, two-point, order OX, partially mapped PMX or similar job two-point, the latter also vectorized over a whole generation)",
             "mutation_type": "Method for mutation (swap or inversion)",
+            "islands": "Number of sub-populations evolved in parallel processes (1 = single population)",
+            "migration_interval": "Generations between two migrations of the best individuals",
+            "migrants": "Number of best individuals each island sends at a migration",
+            "topology": "Where migrants go: the next island on a ring, or a random other island",
+            "local_search_rate": "Fraction of the offspring refined by a short local search each generation (memetic GA, 0 = plain GA)",
+            "local_search_elite": "Also refine the best individual whenever it changes",
+            "local_search_moves": "Maximum number of improving moves per refinement",
+            "local_search_neighborhood": "Moves tried by the refinement (move one job or swap two jobs)",
             "seed": "Random seed for reproducibility"
         }
     },
     "local_search": {
         "name": "Local Search",
-        "description": "A simple hill-climbing algorithm that iteratively improves a solution by exploring its neighborhood.",
+        "description": "A simple hill-climbing algorithm that iteratively improves a solution by exploring its neighborhood. With iterated local search rounds it keeps perturbing and re-descending from the local optimum instead of stopping there.",
         "strengths": ["Simple to implement", "Fast for small problems", "Low memory requirements"],
         "weaknesses": ["Can get stuck in local optima", "Not suitable for complex problems"],
         "parameters": {
             "neighborhood_size": "Number of neighbors to explore",
-            "step_size": "Size of perturbation when generating neighbors"
+            "step_size": "Size of perturbation when generating neighbors",
+            "first_improvement": "Move to the first improving neighbor (scanned in random order with don't-look bits) instead of the best one. Speeds up the insertion neighborhood; with swap it is slower than best improvement",
+            "neighborhood": "Move used to generate neighbors (swap two jobs or move one job to another position)",
+            "ils_iterations": "Number of iterated local search rounds: perturb the local optimum with step_size random moves and descend again (0 = single descent)",
+            "time_limit": "Wall-clock budget in seconds for the iterated local search rounds (0 = no limit)",
+            "acceptance": "Which new local optima replace the current one (better or equal only, or worse ones with a temperature-based probability)",
+            "temperature": "Temperature factor of the temperature-based acceptance"
         }
     },
     "simulated_annealing": {
@@ -102,6 +134,46 @@ algorithm_descriptions = {
             "stagnation_limit": "Number of iterations without improvement before reheating",
             "reheating_factor": "Factor by which to increase temperature when reheating"
         }
+    },
+    "iterated_greedy": {
+        "name": "Iterated Greedy",
+        "description": "Repeatedly removes a few jobs from the current sequence and reinserts them greedily at their best positions (NEH-style), followed by an insertion local search. One of the most effective methods for permutation flow shop.",
+        "strengths": ["State-of-the-art solution quality", "Few parameters", "Fast insertion evaluation (Taillard acceleration)"],
+        "weaknesses": ["Sequential by nature", "Quality depends on the time budget"],
+        "parameters": {
+            "destruction_size": "Number of jobs removed and reinserted at each iteration",
+            "temperature": "Temperature factor of the acceptance criterion (higher accepts more worse solutions)",
+            "iterations": "Maximum number of destruction/construction iterations",
+            "time_limit": "Wall-clock budget in seconds (0 = only the iteration limit)",
+            "local_search": "Apply the insertion local search after each reconstruction",
+            "seed": "Random seed for reproducibility"
+        }
+    },
+    "tabu_search": {
+        "name": "Tabu Search",
+        "description": "Moves to the best neighbor of the current sequence at every iteration, even if it is worse, while forbidding jobs to return to positions they recently left. Tabu moves are still allowed when they improve the best solution found (aspiration).",
+        "strengths": ["Escapes local optima deterministically", "Fast incremental move evaluation", "Candidate lists keep large instances tractable"],
+        "weaknesses": ["Tenure needs tuning", "Each iteration scans a whole neighborhood"],
+        "parameters": {
+            "iterations": "Maximum number of moves",
+            "tenure": "Number of iterations a job may not return to a position it left",
+            "neighborhood": "Move used to generate neighbors (move one job to another position or swap two jobs)",
+            "candidate_size": "Jobs (insertion) or job pairs (swap) sampled and scored per iteration (0 = full neighborhood up to 50 jobs)",
+            "time_limit": "Wall-clock budget in seconds (0 = only the iteration limit)",
+            "seed": "Random seed for reproducibility"
+        }
+    },
+    "branch_and_bound": {
+        "name": "Branch and Bound",
+        "description": "Exact method that enumerates partial sequences (fixing jobs at both ends) and prunes every branch whose machine-based lower bound cannot beat the best known makespan. It proves optimality on small instances and reports the remaining gap when it runs out of time.",
+        "strengths": ["Proven optimal solutions", "Reports a proven lower bound and gap", "Parallel search of subtrees"],
+        "weaknesses": ["Exponential running time", "Only practical for about 20 jobs"],
+        "parameters": {
+            "time_limit": "Wall-clock budget in seconds (0 = until optimality is proven)",
+            "workers": "Number of processes searching subtrees in parallel",
+            "upper_bound": "Heuristic giving the initial best solution",
+            "upper_bound_time": "Seconds of Iterated Greedy used for the initial best solution"
+        }
     }
 }
 
@@ -190,10 +262,23 @@ class TrackableAntSystemOptimizer(AntSystemOptimizer):
 
         self.pheromoneGraph = np.full((self.problem.num_jobs, self.problem.num_jobs), self.sigma0)
         self.frames = []
+        self.static_visibility = (1.0 / self.job_totals) ** self.beta
         
         # Before starting the construction process, we need a reference solution
         start_time = time.time()
-        frames = [self.pheromoneGraph]
+        self.recorder = FrameRecorder.from_params(self.params, self.pheromoneGraph.shape, self.n + 1)
+        if self.recorder is not None:
+            self.recorder.record(self.pheromoneGraph)
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+        if self.colonies > 1:
+            # colonies report the global best through _colonies_progress after every iteration
+            self._optimize_colonies()
+            self.frames = self._recorded_frames()
+            self.execution_time = time.time() - start_time
+            self.tracker.complete(self.best_makespan, self.best_solution)
+            return
         current_solution = list(np.random.permutation(self.problem.num_jobs))
         current_makespan = self.problem.evaluate(current_solution)
         
@@ -207,62 +292,24 @@ class TrackableAntSystemOptimizer(AntSystemOptimizer):
             # Update progress tracker
             self.tracker.update(iteration + 1, current_makespan)
             
-            nb_jobs = self.problem.num_jobs
-            deltaPheromon = np.zeros((self.problem.num_jobs, self.problem.num_jobs))
-            average_makespan = 0
-            ants_log = []
-            
-            for ant in range(self.m):
-                available_jobs = list(range(nb_jobs))
-                path = []
-                first_step = np.random.randint(0, nb_jobs)
-                path.append(first_step)
-                available_jobs.remove(first_step)
-                
-                while len(available_jobs) > 1:
-                    current_job = path[-1]
-                    score_list = [(self.pheromoneGraph[current_job, job]**self.alpha) * 
-                                 ((1/visibility(job, path))**self.beta) for job in available_jobs]
-                    total = sum(score_list)
-                    score_list = np.array(score_list)
-                    distribution = (score_list+(0.001/len(available_jobs))) / (total+0.001)
-                    sampled_job_index = np.random.choice(len(distribution), p=distribution)
-                    selected_job = available_jobs[sampled_job_index]
-                    path.append(selected_job)
-                    available_jobs.remove(selected_job)
-                
-                path.append(available_jobs[0])
-                path_makespan = self.problem.evaluate(path)
-                
-                if path_makespan < current_makespan:
-                    current_solution = path
-                    current_makespan = path_makespan
-                
-                average_makespan += path_makespan
-                deltaSigma = self.q / path_makespan
-                
-                for arc in range(len(path)-1):
-                    deltaPheromon[path[arc], path[arc+1]] += deltaSigma
-                
-                ants_log.append((path, path_makespan))
-            
-            best_iteration_path, best_iteration_path_makespan = min(ants_log, key=lambda x: x[1])
-            
-            # Elitism
-            for arc in range(len(best_iteration_path)-1):
-                deltaPheromon[best_iteration_path[arc], best_iteration_path[arc+1]] += self.e * self.q / best_iteration_path_makespan
+            current_solution, current_makespan = self.colony_iteration(visibility, current_solution, current_makespan)
+            if self.recorder is not None:
+                self.recorder.record(self.pheromoneGraph)
             
-            self.pheromoneGraph = self.pheromoneGraph * (1-self.ro) + deltaPheromon
-            frames.append(self.pheromoneGraph)
+            if self._reached_lower_bound(current_makespan):
+                break
         
         self.best_makespan = current_makespan
         self.best_solution = current_solution
         end_time = time.time()
-        self.frames = frames
+        self.frames = self._recorded_frames()
         self.execution_time = end_time - start_time
         
         # Mark optimization as complete
         self.tracker.complete(self.best_makespan, self.best_solution)
+    
+    def _colonies_progress(self, iteration, makespan):
+        self.tracker.update(iteration, int(makespan))
 
 class TrackableGeneticAlgorithmOptimizer(GeneticAlgorithmOptimizer):
     def __init__(self, problem, tracker, **params):
@@ -270,68 +317,37 @@ class TrackableGeneticAlgorithmOptimizer(GeneticAlgorithmOptimizer):
         self.tracker = tracker
         
     def optimize(self):
+        if self.islands > 1:
+            # islands report the global best through _islands_progress after every migration
+            self._optimize_islands()
+            self.tracker.complete(self.best_makespan, self.best_solution)
+            return
+        
         if self.seed is not None:
             random.seed(self.seed)
             np.random.seed(self.seed)
             
-        # Initial population
-        population = []
-        # NEH seed
-        neh = self._neh_sequence()
-        population.append(Individual(neh, self.problem.evaluate(neh)))
-        base = list(range(self.problem.get_num_jobs()))
-        for _ in range(self.population_size - 1):
-            perm = base[:]
-            random.shuffle(perm)
-            population.append(Individual(perm, self.problem.evaluate(perm)))
+        # Initial population (NEH seed plus random permutations)
+        population, makespans = self._initial_population()
 
-        best = min(population, key=lambda i: i.makespan)
-        self.tracker.update(0, best.makespan)
+        best = int(np.argmin(makespans))
+        self.tracker.update(0, int(makespans[best]))
 
         for iteration in range(self.iterations):
-            new_pop = []
-            best = min(population, key=lambda i: i.makespan)
-            new_pop.append(best)
-            
-            while len(new_pop) < self.population_size:
-                # Selection
-                if self.selection_type == 'tournament':
-                    p1 = self._tournament_selection(population)
-                    p2 = self._tournament_selection(population)
-                else:
-                    p1 = self._roulette_selection(population)
-                    p2 = self._roulette_selection(population)
-                    
-                # Crossover
-                if random.random() < self.crossover_rate:
-                    if self.crossover_type == 'one_point':
-                        c1, c2 = self._one_point_crossover(p1, p2)
-                    else:
-                        c1, c2 = self._two_point_crossover(p1, p2)
-                else:
-                    c1 = Individual(p1.permutation[:], p1.makespan)
-                    c2 = Individual(p2.permutation[:], p2.makespan)
-                    
-                # Mutation
-                for child in (c1, c2):
-                    if random.random() < self.mutation_rate:
-                        if self.mutation_type == 'swap':
-                            self._swap_mutation(child)
-                        else:
-                            self._inversion_mutation(child)
-                            
-                new_pop.extend([c1, c2][:self.population_size - len(new_pop)])
-                
-            population = new_pop
-            best = min(population, key=lambda i: i.makespan)
-            self.tracker.update(iteration + 1, best.makespan)
+            if self._reached_lower_bound(makespans[best]):
+                break
+            population, makespans = self._next_generation(population, makespans, best)
+            best = int(np.argmin(makespans))
+            self.tracker.update(iteration + 1, int(makespans[best]))
 
-        best_final = min(population, key=lambda i: i.makespan)
-        self.best_solution = [int(j) for j in best_final.permutation]
-        self.best_makespan = best_final.makespan
+        self.best_solution = [int(j) for j in population[best]]
+        self.best_makespan = int(makespans[best])
         
         # Mark optimization as complete
         self.tracker.complete(self.best_makespan, self.best_solution)
+        
+    def _islands_progress(self, generation, makespan):
+        self.tracker.update(generation, int(makespan))
 
 class TrackableLocalSearchOptimizer(LocalSearchOptimizer):
     def __init__(self, problem, tracker, **params):
@@ -341,36 +357,34 @@ class TrackableLocalSearchOptimizer(LocalSearchOptimizer):
     def optimize(self):
         # Start with a random permutation of jobs
         current_solution = list(np.random.permutation(self.problem.num_jobs))
-        current_makespan = self.problem.evaluate(current_solution)
+        evaluator = IncrementalEvaluator(self.problem, current_solution)
         
-        self.tracker.update(0, current_makespan)
+        deadline = time.time() + self.time_limit if self.time_limit else None
         
-        # Explore the neighborhood for a maximum of `neighborhood_size` iterations
-        for iteration in range(self.neighborhood_size):
-            best_neighbor = current_solution
-            best_makespan = current_makespan
-
-            # Generate neighbors by swapping two jobs in the current solution
-            for i in range(self.problem.num_jobs):
-                for j in range(i + 1, self.problem.num_jobs):
-                    neighbor = current_solution[:]
-                    neighbor[i], neighbor[j] = neighbor[j], neighbor[i]  # Swap
-                    makespan = self.problem.evaluate(neighbor)
-
-                    if makespan < best_makespan:
-                        best_makespan = makespan
-                        best_neighbor = neighbor
+        self.tracker.update(0, evaluator.makespan)
+        
+        with self._neighborhood_pool() as pool:
+            # Make at most `neighborhood_size` improving moves, stopping at a local optimum
+            moves = self._improving_moves(evaluator, pool)
+            for iteration, current_makespan in zip(range(self.neighborhood_size), moves):
+                self.tracker.update(iteration + 1, current_makespan)
+                if self._reached_lower_bound(current_makespan):
+                    break
 
-            # If a better neighbor is found, update the current solution
-            if best_makespan < current_makespan:
-                current_solution = best_neighbor
-                current_makespan = best_makespan
-                
-            self.tracker.update(iteration + 1, current_makespan)
+            # Iterated local search rounds, reported after the moves of the first descent
+            best_solution, best_makespan = evaluator.sequence[:], evaluator.makespan
+            current_solution, current_makespan = best_solution, best_makespan
+            for round_ in range(self.ils_iterations):
+                if self._reached_lower_bound(best_makespan) or (deadline and time.time() >= deadline):
+                    break
+                current_solution, current_makespan = self._perturb_and_descend(evaluator, pool, current_solution, current_makespan)
+                if current_makespan < best_makespan:
+                    best_solution, best_makespan = current_solution, current_makespan
+                self.tracker.update(self.neighborhood_size + round_ + 1, best_makespan)
 
         # Store the best solution found
-        self.best_solution = [int(x) for x in current_solution]  # Convert to regular Python integers
-        self.best_makespan = float(current_makespan)  # Convert to regular Python float
+        self.best_solution = [int(x) for x in best_solution]  # Convert to regular Python integers
+        self.best_makespan = float(best_makespan)  # Convert to regular Python float
         
         # Mark optimization as complete
         self.tracker.complete(self.best_makespan, self.best_solution)
@@ -382,7 +396,8 @@ class TrackableSimulatedAnnealingOptimizer(SimulatedAnnealingOptimizer):
         
     def optimize(self):
         current_solution = self._neh_heuristic()
-        current_makespan = self.problem.evaluate(current_solution)
+        evaluator = IncrementalEvaluator(self.problem, current_solution)
+        current_makespan = evaluator.makespan
 
         best_solution = current_solution.copy()
         best_makespan = current_makespan
@@ -404,15 +419,16 @@ class TrackableSimulatedAnnealingOptimizer(SimulatedAnnealingOptimizer):
         self.tracker.update(0, best_makespan)
 
         for i in range(iterations):
-            # Generate neighbor
-            neighbor = current_solution.copy()
-            a, b = random.sample(range(len(neighbor)), 2)
-            neighbor[a], neighbor[b] = neighbor[b], neighbor[a]
+            if self._reached_lower_bound(best_makespan):
+                break
 
-            neighbor_makespan = self.problem.evaluate(neighbor)
+            # Generate neighbor, only the jobs from the first swapped position onward are re-simulated
+            a, b = random.sample(range(len(current_solution)), 2)
+            neighbor, neighbor_makespan = evaluator.swap(a, b)
             delta = neighbor_makespan - current_makespan
 
             if delta < 0 or random.random() < math.exp(-delta / T):
+                evaluator.accept(neighbor, min(a, b))
                 current_solution = neighbor
                 current_makespan = neighbor_makespan
 
@@ -439,17 +455,80 @@ class TrackableSimulatedAnnealingOptimizer(SimulatedAnnealingOptimizer):
         # Mark optimization as complete
         self.tracker.complete(self.best_makespan, self.best_solution)
 
+class TrackableIteratedGreedyOptimizer(IteratedGreedyOptimizer):
+    def __init__(self, problem, tracker, **params):
+        super().__init__(problem, **params)
+        self.tracker = tracker
+        
+    def optimize(self):
+        super().optimize()
+        self.best_solution = [int(x) for x in self.best_solution]
+        self.best_makespan = float(self.best_makespan)
+        
+        # Mark optimization as complete
+        self.tracker.complete(self.best_makespan, self.best_solution)
+        
+    def _iteration_done(self, iteration, best_makespan):
+        self.tracker.update(iteration, best_makespan)
+
+class TrackableTabuSearchOptimizer(TabuSearchOptimizer):
+    def __init__(self, problem, tracker, **params):
+        super().__init__(problem, **params)
+        self.tracker = tracker
+        
+    def optimize(self):
+        super().optimize()
+        self.best_solution = [int(x) for x in self.best_solution]
+        self.best_makespan = float(self.best_makespan)
+        
+        # Mark optimization as complete
+        self.tracker.complete(self.best_makespan, self.best_solution)
+        
+    def _iteration_done(self, iteration, best_makespan):
+        self.tracker.update(iteration, best_makespan)
+
+class TrackableBranchAndBoundOptimizer(BranchAndBoundOptimizer):
+    def __init__(self, problem, tracker, **params):
+        super().__init__(problem, **params)
+        self.tracker = tracker
+        
+    def optimize(self):
+        super().optimize()
+        self.best_solution = [int(x) for x in self.best_solution]
+        self.best_makespan = float(self.best_makespan)
+        
+        # Mark optimization as complete
+        self.tracker.complete(self.best_makespan, self.best_solution)
+        
+    def _subtree_done(self, done, total, best_makespan):
+        # progress is counted in searched subtrees, their number is only known once the tree is split
+        self.tracker.total_iterations = total
+        self.tracker.update(done, best_makespan)
+
+def prune_videos(keep):
+    # deletes all but the newest keep animations in VIDEO_FOLDER
+    videos = sorted((entry for entry in os.scandir(VIDEO_FOLDER) if entry.is_file()),
+                    key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in videos[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass  # already gone, or still being written by another run
+
 @app.route('/')
 def index():
     # Get list of available problem instances
-    problem_instances = sorted([f for f in os.listdir('data') if f.endswith('.txt')])
+    problem_instances = sorted([f for f in os.listdir('data') if f.endswith(('.txt', '.fsp'))])
     
     # Define available algorithms
     algorithms = [
         {"id": "ant_system", "name": "Ant System"},
         {"id": "genetic", "name": "Genetic Algorithm"},
         {"id": "local_search", "name": "Local Search"},
-        {"id": "simulated_annealing", "name": "Simulated Annealing"}
+        {"id": "simulated_annealing", "name": "Simulated Annealing"},
+        {"id": "iterated_greedy", "name": "Iterated Greedy"},
+        {"id": "tabu_search", "name": "Tabu Search"},
+        {"id": "branch_and_bound", "name": "Branch and Bound"}
     ]
     
     return render_template('index.html', problem_instances=problem_instances, algorithms=algorithms, algorithm_descriptions=algorithm_descriptions)
@@ -482,6 +561,24 @@ def get_algorithm_params():
                  'description': algorithm_descriptions['ant_system']['parameters']['n']},
                 {'id': 'e', 'name': 'Elitism Factor', 'type': 'number', 'default': 1.0, 'min': 0.0, 'max': 5.0, 'step': 0.1,
                  'description': algorithm_descriptions['ant_system']['parameters']['e']},
+                {'id': 'candidate_size', 'name': 'Candidate List Size', 'type': 'number', 'default': 0, 'min': 0, 'max': 100, 'step': 1,
+                 'description': algorithm_descriptions['ant_system']['parameters']['candidate_size']},
+                {'id': 'mmas', 'name': 'MAX-MIN Bounds', 'type': 'select',
+                 'options': [{'value': 'false', 'text': 'Off'}, {'value': 'true', 'text': 'On'}],
+                 'default': 'false',
+                 'description': algorithm_descriptions['ant_system']['parameters']['mmas']},
+                {'id': 'local_search', 'name': 'Local Search Daemon', 'type': 'select',
+                 'options': [{'value': 'false', 'text': 'Off'}, {'value': 'true', 'text': 'On'}],
+                 'default': 'false',
+                 'description': algorithm_descriptions['ant_system']['parameters']['local_search']},
+                {'id': 'colonies', 'name': 'Colonies', 'type': 'number', 'default': 1, 'min': 1, 'max': 16, 'step': 1,
+                 'description': algorithm_descriptions['ant_system']['parameters']['colonies']},
+                {'id': 'exchange_interval', 'name': 'Exchange Interval', 'type': 'number', 'default': 0, 'min': 0, 'max': 100, 'step': 1,
+                 'description': algorithm_descriptions['ant_system']['parameters']['exchange_interval']},
+                {'id': 'record_video', 'name': 'Pheromone Animation', 'type': 'select',
+                 'options': [{'value': 'false', 'text': 'Off'}, {'value': 'true', 'text': 'On'}],
+                 'default': 'false',
+                 'description': algorithm_descriptions['ant_system']['parameters']['record_video']},
             ]
         })
     elif algorithm == 'genetic':
@@ -502,13 +599,38 @@ def get_algorithm_params():
                 {'id': 'tournament_size', 'name': 'Tournament Size', 'type': 'number', 'default': 3, 'min': 2, 'max': 10, 'step': 1,
                  'description': algorithm_descriptions['genetic']['parameters']['tournament_size']},
                 {'id': 'crossover_type', 'name': 'Crossover Type', 'type': 'select',
-                 'options': [{'value': 'two_point', 'text': 'Two Point'}, {'value': 'one_point', 'text': 'One Point'}],
+                 'options': [{'value': 'two_point', 'text': 'Two Point'}, {'value': 'one_point', 'text': 'One Point'},
+                             {'value': 'ox', 'text': 'Order (OX)'}, {'value': 'pmx', 'text': 'Partially Mapped (PMX)'},
+                             {'value': 'similar_job', 'text': 'Similar Job Two Point (SJ2OX)'},
+                             {'value': 'similar_job_batch', 'text': 'Similar Job Two Point, whole generation at once'}],
                  'default': 'two_point',
                  'description': algorithm_descriptions['genetic']['parameters']['crossover_type']},
                 {'id': 'mutation_type', 'name': 'Mutation Type', 'type': 'select',
                  'options': [{'value': 'inversion', 'text': 'Inversion'}, {'value': 'swap', 'text': 'Swap'}],
                  'default': 'inversion',
                  'description': algorithm_descriptions['genetic']['parameters']['mutation_type']},
+                {'id': 'islands', 'name': 'Islands', 'type': 'number', 'default': 1, 'min': 1, 'max': 32, 'step': 1,
+                 'description': algorithm_descriptions['genetic']['parameters']['islands']},
+                {'id': 'migration_interval', 'name': 'Migration Interval', 'type': 'number', 'default': 10, 'min': 1, 'max': 500, 'step': 1,
+                 'description': algorithm_descriptions['genetic']['parameters']['migration_interval']},
+                {'id': 'migrants', 'name': 'Migrants', 'type': 'number', 'default': 2, 'min': 1, 'max': 20, 'step': 1,
+                 'description': algorithm_descriptions['genetic']['parameters']['migrants']},
+                {'id': 'topology', 'name': 'Migration Topology', 'type': 'select',
+                 'options': [{'value': 'ring', 'text': 'Ring'}, {'value': 'random', 'text': 'Random'}],
+                 'default': 'ring',
+                 'description': algorithm_descriptions['genetic']['parameters']['topology']},
+                {'id': 'local_search_rate', 'name': 'Local Search Rate', 'type': 'number', 'default': 0.0, 'min': 0.0, 'max': 1.0, 'step': 0.05,
+                 'description': algorithm_descriptions['genetic']['parameters']['local_search_rate']},
+                {'id': 'local_search_elite', 'name': 'Refine Elite', 'type': 'select',
+                 'options': [{'value': 'false', 'text': 'No'}, {'value': 'true', 'text': 'Yes'}],
+                 'default': 'false',
+                 'description': algorithm_descriptions['genetic']['parameters']['local_search_elite']},
+                {'id': 'local_search_moves', 'name': 'Local Search Moves', 'type': 'number', 'default': 20, 'min': 1, 'max': 200, 'step': 1,
+                 'description': algorithm_descriptions['genetic']['parameters']['local_search_moves']},
+                {'id': 'local_search_neighborhood', 'name': 'Local Search Neighborhood', 'type': 'select',
+                 'options': [{'value': 'insertion', 'text': 'Insertion'}, {'value': 'swap', 'text': 'Swap'}],
+                 'default': 'insertion',
+                 'description': algorithm_descriptions['genetic']['parameters']['local_search_neighborhood']},
                 {'id': 'seed', 'name': 'Random Seed', 'type': 'number', 'default': 42, 'min': 0, 'max': 10000, 'step': 1,
                  'description': algorithm_descriptions['genetic']['parameters']['seed']},
             ]
@@ -520,6 +642,24 @@ def get_algorithm_params():
                  'description': algorithm_descriptions['local_search']['parameters']['neighborhood_size']},
                 {'id': 'step_size', 'name': 'Step Size', 'type': 'number', 'default': 1, 'min': 1, 'max': 5, 'step': 1,
                  'description': algorithm_descriptions['local_search']['parameters']['step_size']},
+                {'id': 'first_improvement', 'name': 'First Improvement', 'type': 'select',
+                 'options': [{'value': 'false', 'text': 'Best Improvement'}, {'value': 'true', 'text': 'First Improvement'}],
+                 'default': 'false',
+                 'description': algorithm_descriptions['local_search']['parameters']['first_improvement']},
+                {'id': 'neighborhood', 'name': 'Neighborhood', 'type': 'select',
+                 'options': [{'value': 'swap', 'text': 'Swap'}, {'value': 'insertion', 'text': 'Insertion'}],
+                 'default': 'swap',
+                 'description': algorithm_descriptions['local_search']['parameters']['neighborhood']},
+                {'id': 'ils_iterations', 'name': 'ILS Rounds', 'type': 'number', 'default': 0, 'min': 0, 'max': 10000, 'step': 10,
+                 'description': algorithm_descriptions['local_search']['parameters']['ils_iterations']},
+                {'id': 'time_limit', 'name': 'Time Limit (s)', 'type': 'number', 'default': 0, 'min': 0, 'max': 3600, 'step': 1,
+                 'description': algorithm_descriptions['local_search']['parameters']['time_limit']},
+                {'id': 'acceptance', 'name': 'Acceptance', 'type': 'select',
+                 'options': [{'value': 'better', 'text': 'Better or Equal'}, {'value': 'temperature', 'text': 'Temperature'}],
+                 'default': 'better',
+                 'description': algorithm_descriptions['local_search']['parameters']['acceptance']},
+                {'id': 'temperature', 'name': 'Temperature Factor', 'type': 'number', 'default': 0.4, 'min': 0.0, 'max': 2.0, 'step': 0.1,
+                 'description': algorithm_descriptions['local_search']['parameters']['temperature']},
             ]
         })
     elif algorithm == 'simulated_annealing':
@@ -556,12 +696,65 @@ def get_algorithm_params():
                  'description': algorithm_descriptions['simulated_annealing']['parameters']['reheating_factor']},
             ]
         })
+    elif algorithm == 'iterated_greedy':
+        return jsonify({
+            'params': [
+                {'id': 'destruction_size', 'name': 'Destruction Size (d)', 'type': 'number', 'default': 4, 'min': 1, 'max': 10, 'step': 1,
+                 'description': algorithm_descriptions['iterated_greedy']['parameters']['destruction_size']},
+                {'id': 'temperature', 'name': 'Temperature Factor', 'type': 'number', 'default': 0.4, 'min': 0.0, 'max': 2.0, 'step': 0.1,
+                 'description': algorithm_descriptions['iterated_greedy']['parameters']['temperature']},
+                {'id': 'iterations', 'name': 'Number of Iterations', 'type': 'number', 'default': 1000, 'min': 10, 'max': 100000, 'step': 10,
+                 'description': algorithm_descriptions['iterated_greedy']['parameters']['iterations']},
+                {'id': 'time_limit', 'name': 'Time Limit (s)', 'type': 'number', 'default': 0, 'min': 0, 'max': 3600, 'step': 1,
+                 'description': algorithm_descriptions['iterated_greedy']['parameters']['time_limit']},
+                {'id': 'local_search', 'name': 'Local Search', 'type': 'select',
+                 'options': [{'value': 'true', 'text': 'Enabled'}, {'value': 'false', 'text': 'Disabled'}],
+                 'default': 'true',
+                 'description': algorithm_descriptions['iterated_greedy']['parameters']['local_search']},
+                {'id': 'seed', 'name': 'Random Seed', 'type': 'number', 'default': 42, 'min': 0, 'max': 10000, 'step': 1,
+                 'description': algorithm_descriptions['iterated_greedy']['parameters']['seed']},
+            ]
+        })
+    elif algorithm == 'tabu_search':
+        return jsonify({
+            'params': [
+                {'id': 'iterations', 'name': 'Number of Iterations', 'type': 'number', 'default': 1000, 'min': 10, 'max': 100000, 'step': 10,
+                 'description': algorithm_descriptions['tabu_search']['parameters']['iterations']},
+                {'id': 'tenure', 'name': 'Tabu Tenure', 'type': 'number', 'default': 7, 'min': 1, 'max': 50, 'step': 1,
+                 'description': algorithm_descriptions['tabu_search']['parameters']['tenure']},
+                {'id': 'neighborhood', 'name': 'Neighborhood', 'type': 'select',
+                 'options': [{'value': 'insertion', 'text': 'Insertion'}, {'value': 'swap', 'text': 'Swap'}],
+                 'default': 'insertion',
+                 'description': algorithm_descriptions['tabu_search']['parameters']['neighborhood']},
+                {'id': 'candidate_size', 'name': 'Candidate List Size', 'type': 'number', 'default': 0, 'min': 0, 'max': 5000, 'step': 5,
+                 'description': algorithm_descriptions['tabu_search']['parameters']['candidate_size']},
+                {'id': 'time_limit', 'name': 'Time Limit (s)', 'type': 'number', 'default': 0, 'min': 0, 'max': 3600, 'step': 1,
+                 'description': algorithm_descriptions['tabu_search']['parameters']['time_limit']},
+                {'id': 'seed', 'name': 'Random Seed', 'type': 'number', 'default': 42, 'min': 0, 'max': 10000, 'step': 1,
+                 'description': algorithm_descriptions['tabu_search']['parameters']['seed']},
+            ]
+        })
+    elif algorithm == 'branch_and_bound':
+        return jsonify({
+            'params': [
+                {'id': 'time_limit', 'name': 'Time Limit (s)', 'type': 'number', 'default': 60, 'min': 0, 'max': 86400, 'step': 10,
+                 'description': algorithm_descriptions['branch_and_bound']['parameters']['time_limit']},
+                {'id': 'workers', 'name': 'Workers', 'type': 'number', 'default': 1, 'min': 1, 'max': 64, 'step': 1,
+                 'description': algorithm_descriptions['branch_and_bound']['parameters']['workers']},
+                {'id': 'upper_bound', 'name': 'Initial Upper Bound', 'type': 'select',
+                 'options': [{'value': 'neh', 'text': 'NEH'}, {'value': 'iterated_greedy', 'text': 'Iterated Greedy'}],
+                 'default': 'neh',
+                 'description': algorithm_descriptions['branch_and_bound']['parameters']['upper_bound']},
+                {'id': 'upper_bound_time', 'name': 'Upper Bound Time (s)', 'type': 'number', 'default': 1, 'min': 0, 'max': 60, 'step': 0.5,
+                 'description': algorithm_descriptions['branch_and_bound']['parameters']['upper_bound_time']},
+            ]
+        })
     else:
         return jsonify({'params': []})
     
 @app.route('/get_problem_instances')
 def get_problem_instances():
-    problem_instances = [f for f in os.listdir('data') if f.endswith('.txt')]
+    problem_instances = [f for f in os.listdir('data') if f.endswith(('.txt', '.fsp'))]
     return jsonify(sorted(problem_instances))
 
 @app.route('/run_optimization', methods=['POST'])
@@ -576,21 +769,30 @@ def run_optimization():
     
     # Load the problem
     problem_path = os.path.join('data', problem_instance)
-    problem = FlowShopProblem(problem_path)
+    problem = instance_registry.problem(problem_path)
     
     # Convert parameters to appropriate types
     for key, value in params.items():
         if isinstance(value, str):
             # Convert string values to appropriate types
             if key in ['alpha', 'beta', 'q', 'ro', 'sigma0', 'e', 'crossover_rate', 'mutation_rate', 
-                      'initial_temperature', 'cooling_rate', 'reheating_factor']:
+                      'initial_temperature', 'cooling_rate', 'reheating_factor', 'temperature', 'time_limit', 'upper_bound_time',
+                      'local_search_rate']:
                 params[key] = float(value)
             elif key in ['m', 'n', 'population_size', 'iterations', 'num_iterations', 'tournament_size', 
-                        'neighborhood_size', 'step_size', 'stagnation_limit', 'seed']:
+                        'neighborhood_size', 'step_size', 'stagnation_limit', 'seed', 'cache_size',
+                        'workers', 'chunk_size', 'destruction_size', 'ils_iterations', 'tenure', 'candidate_size',
+                        'islands', 'migration_interval', 'migrants', 'local_search_moves',
+                        'colonies', 'exchange_interval']:
                 params[key] = int(value)
-            elif key == 'first_improvement':
+            elif key in ['first_improvement', 'local_search', 'local_search_elite', 'record_video', 'mmas']:
                 params[key] = value.lower() == 'true'
     
+    # The animation only needs a frame every few iterations
+    if algorithm == 'ant_system' and params.get('record_video'):
+        params['record_frames'] = True
+        params['frame_stride'] = max(1, params.get('n', 500) // VIDEO_FRAMES)
+    
     # Determine the total iterations for progress tracking
     total_iterations = 100  # Default
     if algorithm == 'ant_system':
@@ -598,9 +800,11 @@ def run_optimization():
     elif algorithm == 'genetic':
         total_iterations = params.get('iterations', 100)
     elif algorithm == 'local_search':
-        total_iterations = params.get('neighborhood_size', 10)
+        total_iterations = params.get('neighborhood_size', 10) + params.get('ils_iterations', 0)
     elif algorithm == 'simulated_annealing':
         total_iterations = params.get('num_iterations', 1000)
+    elif algorithm in ['iterated_greedy', 'tabu_search']:
+        total_iterations = params.get('iterations', 1000)
     
     # Create a progress tracker
     tracker = ProgressTracker(optimizer_id, total_iterations)
@@ -617,12 +821,19 @@ def run_optimization():
                 optimizer = TrackableLocalSearchOptimizer(problem, tracker, **params)
             elif algorithm == 'simulated_annealing':
                 optimizer = TrackableSimulatedAnnealingOptimizer(problem, tracker, **params)
+            elif algorithm == 'iterated_greedy':
+                optimizer = TrackableIteratedGreedyOptimizer(problem, tracker, **params)
+            elif algorithm == 'tabu_search':
+                optimizer = TrackableTabuSearchOptimizer(problem, tracker, **params)
+            elif algorithm == 'branch_and_bound':
+                optimizer = TrackableBranchAndBoundOptimizer(problem, tracker, **params)
             else:
                 tracker.error('Invalid algorithm selection')
                 return
             
             # Run optimization
             optimizer.optimize()
+            schedule = problem.schedule(optimizer.best_solution)
             
             # Extract results
             result = {
@@ -632,7 +843,11 @@ def run_optimization():
                 'params': params,
                 'makespan': float(optimizer.best_makespan) if isinstance(optimizer.best_makespan, np.number) else optimizer.best_makespan,
                 'execution_time': optimizer.execution_time if hasattr(optimizer, 'execution_time') else time.time() - tracker.start_time,
-                'solution': [int(x) if isinstance(x, np.integer) else x for x in optimizer.best_solution]
+                'solution': [int(x) if isinstance(x, np.integer) else x for x in optimizer.best_solution],
+                'lower_bound': int(getattr(optimizer, 'proven_lower_bound', None) or problem.lower_bound),
+                'gap': optimizer.optimality_gap(),
+                'total_flow_time': schedule.total_flow_time,
+                'total_idle_time': int(schedule.machine_idle_time.sum())
             }
             
             # Save to history
@@ -644,10 +859,10 @@ def run_optimization():
             
             # Generate solution visualization for algorithms that support it
             solution_viz = None
-            if algorithm == 'ant_system' and hasattr(optimizer, 'frames') and len(optimizer.frames) > 0:
-                # For ant system, we can plot pheromone matrix evolution
+            if algorithm == 'ant_system':
+                # For ant system, we plot the final pheromone matrix (frames are only recorded on request)
                 plt.figure(figsize=(8, 6))
-                plt.imshow(optimizer.frames[-1], cmap='hot', interpolation='nearest')
+                plt.imshow(optimizer.pheromoneGraph, cmap='hot', interpolation='nearest')
                 plt.colorbar(label='Pheromone Intensity')
                 plt.title('Final Pheromone Matrix')
                 plt.tight_layout()
@@ -660,7 +875,7 @@ def run_optimization():
                 plt.close()
             
             # Generate Gantt chart for best solution
-            gantt_chart = generate_gantt_chart(problem, optimizer.best_solution)
+            gantt_chart = generate_gantt_chart(schedule)
             
             # Clean up
             if optimizer_id in ongoing_optimizations:
@@ -672,10 +887,25 @@ def run_optimization():
                 'makespan': float(optimizer.best_makespan) if isinstance(optimizer.best_makespan, np.number) else optimizer.best_makespan,
                 'execution_time': float(result['execution_time']),
                 'solution': result['solution'],
+                'lower_bound': result['lower_bound'],
+                'gap': result['gap'],
+                'schedule': schedule.to_dict(),
                 'solution_viz': solution_viz,
                 'gantt_chart': gantt_chart
             })
             
+            # The animation is encoded in the background once the result is out, the page gets its link
+            # when the file is written
+            if algorithm == 'ant_system' and len(optimizer.frames) > 0:
+                os.makedirs(VIDEO_FOLDER, exist_ok=True)
+                prune_videos(VIDEO_FILES - 1)
+                video_file = os.path.join(VIDEO_FOLDER, f"{optimizer_id}.gif")
+                encode_in_background(optimizer.frames, video_file, fps=10, size=300,
+                                     callback=lambda path: socketio.emit('optimization_video', {
+                                         'id': optimizer_id,
+                                         'url': '/' + path.replace(os.sep, '/')
+                                     }))
+            
         except Exception as e:
             traceback.print_exc()
             tracker.error(str(e))
@@ -812,47 +1042,26 @@ def algorithm_info(algorithm_id):
     else:
         return jsonify({'error': 'Algorithm not found'})
 
-def generate_gantt_chart(problem, solution):
-    """Generate a Gantt chart for the given solution"""
-    jobs = len(solution)
-    machines = problem.num_machines
-    
-    # Calculate completion times
-    completion_times = np.zeros((jobs, machines))
-    
-    for job_idx, job in enumerate(solution):
-        for machine in range(machines):
-            if job_idx == 0 and machine == 0:
-                completion_times[job_idx][machine] = problem.processing_times[machine][job]
-            elif job_idx == 0:
-                completion_times[job_idx][machine] = completion_times[job_idx][machine-1] + problem.processing_times[machine][job]
-            elif machine == 0:
-                completion_times[job_idx][machine] = completion_times[job_idx-1][machine] + problem.processing_times[machine][job]
-            else:
-                completion_times[job_idx][machine] = max(completion_times[job_idx-1][machine], 
-                                                       completion_times[job_idx][machine-1]) + problem.processing_times[machine][job]
+def generate_gantt_chart(schedule):
+    """Generate a Gantt chart for the given schedule"""
+    jobs, machines = schedule.processing_times.shape
     
     # Create Gantt chart
     plt.figure(figsize=(12, 6))
     colors = plt.cm.viridis(np.linspace(0, 1, jobs))
     
-    for job_idx, job in enumerate(solution):
+    # One bar per (job, machine) pair, drawn in a single call from the schedule's start times
+    machine_idx = np.tile(np.arange(machines), jobs)
+    starts = schedule.start_times.ravel()
+    durations = schedule.processing_times.ravel()
+    plt.barh(machine_idx, durations, left=starts, height=0.5,
+            color=np.repeat(colors, machines, axis=0), alpha=0.8)
+    
+    # Add job number label in the middle of each bar
+    for job_idx, job in enumerate(schedule.sequence):
         for machine in range(machines):
-            if job_idx == 0 and machine == 0:
-                start_time = 0
-            elif job_idx == 0:
-                start_time = completion_times[job_idx][machine-1] - problem.processing_times[machine][job]
-            elif machine == 0:
-                start_time = completion_times[job_idx-1][machine]
-            else:
-                start_time = max(completion_times[job_idx-1][machine], 
-                                completion_times[job_idx][machine-1])
-            
-            duration = problem.processing_times[machine][job]
-            plt.barh(machine, duration, left=start_time, height=0.5, 
-                    color=colors[job_idx], alpha=0.8)
-            
-            # Add job number label in the middle of each bar
+            start_time = schedule.start_times[job_idx, machine]
+            duration = schedule.processing_times[job_idx, machine]
             plt.text(start_time + duration/2, machine, f'J{job}', 
                     ha='center', va='center', color='black', fontweight='bold')
     
@@ -883,7 +1092,7 @@ def compare_algorithms():
     
     # Load the problem
     problem_path = os.path.join('data', problem_instance)
-    problem = FlowShopProblem(problem_path)
+    problem = instance_registry.problem(problem_path)
     
     results = []
     
@@ -895,12 +1104,16 @@ def compare_algorithms():
         for key, value in params.items():
             if isinstance(value, str):
                 if key in ['alpha', 'beta', 'q', 'ro', 'sigma0', 'e', 'crossover_rate', 'mutation_rate', 
-                          'initial_temperature', 'cooling_rate', 'reheating_factor']:
+                          'initial_temperature', 'cooling_rate', 'reheating_factor', 'temperature', 'time_limit', 'upper_bound_time',
+                          'local_search_rate']:
                     params[key] = float(value)
                 elif key in ['m', 'n', 'population_size', 'iterations', 'num_iterations', 'tournament_size', 
-                            'neighborhood_size', 'step_size', 'stagnation_limit', 'seed']:
+                            'neighborhood_size', 'step_size', 'stagnation_limit', 'seed', 'cache_size',
+                        'workers', 'chunk_size', 'destruction_size', 'ils_iterations', 'tenure', 'candidate_size',
+                        'islands', 'migration_interval', 'migrants', 'local_search_moves',
+                        'colonies', 'exchange_interval']:
                     params[key] = int(value)
-                elif key == 'first_improvement':
+                elif key in ['first_improvement', 'local_search', 'local_search_elite', 'record_video', 'mmas']:
                     params[key] = value.lower() == 'true'
         
         # Run the algorithm
@@ -914,12 +1127,19 @@ def compare_algorithms():
                 optimizer = LocalSearchOptimizer(problem, **params)
             elif algorithm == 'simulated_annealing':
                 optimizer = SimulatedAnnealingOptimizer(problem, **params)
+            elif algorithm == 'iterated_greedy':
+                optimizer = IteratedGreedyOptimizer(problem, **params)
+            elif algorithm == 'tabu_search':
+                optimizer = TabuSearchOptimizer(problem, **params)
+            elif algorithm == 'branch_and_bound':
+                optimizer = BranchAndBoundOptimizer(problem, **params)
             else:
                 return jsonify({'error': f'Invalid algorithm selection: {algorithm}'})
             
             # Run optimization
             optimizer.optimize()
             execution_time = time.time() - start_time
+            schedule = problem.schedule(optimizer.best_solution)
             
             # Extract results
             result = {
@@ -928,7 +1148,11 @@ def compare_algorithms():
                 'params': params,
                 'makespan': float(optimizer.best_makespan) if isinstance(optimizer.best_makespan, np.number) else optimizer.best_makespan,
                 'execution_time': float(execution_time),
-                'solution': [int(x) if isinstance(x, np.integer) else x for x in optimizer.best_solution]
+                'solution': [int(x) if isinstance(x, np.integer) else x for x in optimizer.best_solution],
+                'lower_bound': int(getattr(optimizer, 'proven_lower_bound', None) or problem.lower_bound),
+                'gap': optimizer.optimality_gap(),
+                'total_flow_time': schedule.total_flow_time,
+                'total_idle_time': int(schedule.machine_idle_time.sum())
             }
             
             results.append(result)
@@ -990,7 +1214,7 @@ def get_problem_info(problem_instance):
     problem_path = os.path.join('data', problem_instance)
     
     try:
-        problem = FlowShopProblem(problem_path)
+        problem = instance_registry.problem(problem_path)
         
         # Generate a visualization of the processing times
         plt.figure(figsize=(10, 6))
@@ -1036,18 +1260,15 @@ def recommend_algorithm():
     # Load the problem
     problem_path = os.path.join('data', problem_instance)
     try:
-        problem = FlowShopProblem(problem_path)
-        
-        # Analyze problem characteristics
-        num_jobs = problem.num_jobs
-        num_machines = problem.num_machines
-        processing_times = problem.processing_times
+        # Analyze problem characteristics (computed once per instance by the registry)
+        features = instance_registry.entry(problem_path).features
+        num_jobs = features['num_jobs']
+        num_machines = features['num_machines']
         
-        # Calculate some metrics
-        avg_processing_time = np.mean(processing_times)
-        std_processing_time = np.std(processing_times)
-        max_processing_time = np.max(processing_times)
-        min_processing_time = np.min(processing_times)
+        avg_processing_time = features['avg_processing_time']
+        std_processing_time = features['std_processing_time']
+        max_processing_time = features['max_processing_time']
+        min_processing_time = features['min_processing_time']
         
         # Simple recommendation logic based on problem size and characteristics
         recommendation = {}
@@ -1144,6 +1365,8 @@ def algorithm_analytics():
     for algorithm, results in algorithms.items():
         makespans = [float(r['makespan']) if isinstance(r['makespan'], np.number) else r['makespan'] for r in results]
         execution_times = [float(r['execution_time']) for r in results]
+        flow_times = [r['total_flow_time'] for r in results]
+        idle_times = [r['total_idle_time'] for r in results]
         
         analytics[algorithm] = {
             'count': len(results),
@@ -1153,6 +1376,8 @@ def algorithm_analytics():
             'avg_execution_time': sum(execution_times) / len(execution_times) if execution_times else 0,
             'min_execution_time': min(execution_times) if execution_times else 0,
             'max_execution_time': max(execution_times) if execution_times else 0,
+            'avg_total_flow_time': sum(flow_times) / len(flow_times) if flow_times else 0,
+            'avg_total_idle_time': sum(idle_times) / len(idle_times) if idle_times else 0,
             'problem_instances': list(set(r['problem_instance'] for r in results))
         }
     